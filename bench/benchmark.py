@@ -0,0 +1,183 @@
+"""
+Offline scraper benchmark
+Replays the recorded board responses in bench/fixtures through a requests
+transport adapter, so every scraper and a full collect_new_jobs() run can be
+timed without touching the network.
+
+    python bench/benchmark.py                      # defaults
+    python bench/benchmark.py --companies 600 --latency 50 --json baseline.json
+"""
+
+import argparse, json, logging, re, sys, tempfile, time, tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import job_agent as ja
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# (url pattern, fixture file, content type) — first match wins
+ROUTES = [
+    (re.compile(r'boards-api\.greenhouse\.io/v1/boards/([^/]+)/jobs'), "greenhouse_jobs.json",  "application/json"),
+    (re.compile(r'api\.lever\.co/v0/postings/([^/?]+)'),               "lever_postings.json",   "application/json"),
+    (re.compile(r'//([^.]+)\.wd\d+\.myworkdayjobs\.com/wday/cxs/'),    "workday_cxs_jobs.json", "application/json"),
+    (re.compile(r'//([^.]+)\.wd\d+\.myworkdayjobs\.com/'),             "workday_landing.html",  "text/html; charset=utf-8"),
+    (re.compile(r'//([^/]+)/'),                                        "careers_portal.html",   "text/html; charset=utf-8"),
+]
+
+
+class FixtureAdapter(BaseAdapter):
+    """Answers every request from bench/fixtures, optionally after a fake delay.
+
+    `__BOARD__` in a fixture is replaced by the board token from the URL so
+    every synthetic board yields its own job ids. Workday cxs requests are
+    paged with the offset/limit from the POST body.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.requests = 0
+        self._raw = {name: (FIXTURES / name).read_text() for _, name, _ in ROUTES}
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        for pattern, name, ctype in ROUTES:
+            m = pattern.search(request.url)
+            if m:
+                break
+        body = self._raw[name].replace("__BOARD__", m.group(1))
+        if "/wday/cxs/" in request.url:
+            q = json.loads(request.body)
+            data = json.loads(body)
+            data["jobPostings"] = data["jobPostings"][q["offset"]:q["offset"] + q["limit"]]
+            body = json.dumps(data)
+
+        r = requests.Response()
+        r.status_code = 200
+        r.reason = "OK"
+        r.url = request.url
+        r.request = request
+        r.headers = CaseInsensitiveDict({"Content-Type": ctype})
+        r._content = body.encode()
+        r.encoding = "utf-8"
+        r.elapsed = timedelta(seconds=self.latency)
+        return r
+
+    def close(self):
+        pass
+
+
+def isolate(workdir: Path, adapter: FixtureAdapter):
+    """Point every piece of job_agent state at `workdir` and at the fixtures."""
+    ja.SEEN_PATH = workdir / "seen_jobs.json"
+    ja.SEEN_DB_PATH = workdir / "seen_jobs.db"
+    ja.SEEN_EXPORT_PATH = workdir / "seen_jobs.tsv"
+    ja.METRICS_DIR = workdir / "metrics"
+    ja.http_cache = ja.ValidatorCache(workdir / "http_cache.json")
+    ja.breaker = ja.CircuitBreaker(workdir / "board_health.json", ja.BREAKER_THRESHOLD, ja.BREAKER_COOLDOWN)
+    ja.schedule = ja.CrawlSchedule(workdir / "crawl_state.json")
+    ja.limiter = ja.HostRateLimiter(0)
+    ja.session.mount("https://", adapter)
+    ja.session.mount("http://", adapter)
+
+
+def synthetic_companies(n: int) -> list[ja.Board]:
+    """`n` distinct boards cycling through the four ATS types."""
+    makers = [
+        lambda i: ja.Board(f"Greenhouse Co {i}", "Toronto", f"https://boards.greenhouse.io/ghco{i}", "greenhouse"),
+        lambda i: ja.Board(f"Lever Co {i}",      "Toronto", f"https://jobs.lever.co/leverco{i}", "lever"),
+        lambda i: ja.Board(f"Workday Co {i}",    "Halifax", f"https://wdco{i}.wd3.myworkdayjobs.com/External/jobs", "workday"),
+        lambda i: ja.Board(f"Portal Co {i}",     "Halifax", f"https://careers-{i}.example.com/search", "html"),
+    ]
+    return [makers[i % len(makers)](i) for i in range(n)]
+
+
+def bench_scraper(name: str, fn, url: str, iterations: int) -> dict:
+    fn(url)                                   # warm-up
+    t0 = time.perf_counter()
+    postings = 0
+    for _ in range(iterations):
+        postings += len(fn(url))
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    fn(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "scraper":      name,
+        "calls_per_s":  round(iterations / elapsed, 1),
+        "postings_per_s": round(postings / elapsed, 1),
+        "postings_per_call": postings // iterations,
+        "peak_kb":      round(peak / 1024, 1),
+    }
+
+
+def bench_collect(n: int, workdir: Path) -> dict:
+    boards = synthetic_companies(n)
+    result = {"companies": n}
+    for label in ("first_run", "repeat_run"):        # repeat_run: everything already seen
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        new_jobs, seen = ja.collect_new_jobs(boards=boards, force=True)
+        result[f"{label}_s"] = round(time.perf_counter() - t0, 3)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        seen.close()
+        result[f"{label}_new"] = len(new_jobs)
+        result[f"{label}_peak_mb"] = round(peak / 1024 / 1024, 1)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--iterations", type=int, default=30, help="calls per scraper for throughput")
+    ap.add_argument("--companies", type=int, default=400, help="synthetic boards for the end-to-end run")
+    ap.add_argument("--latency", type=float, default=0.0, help="fake per-request latency in ms")
+    ap.add_argument("--json", type=Path, help="also write the results to this file")
+    args = ap.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    adapter = FixtureAdapter(args.latency / 1000)
+    workdir = Path(tempfile.mkdtemp(prefix="job-agent-bench-"))
+    isolate(workdir, adapter)
+
+    scrapers = [
+        ("greenhouse",   ja.scrape_greenhouse,   "https://boards.greenhouse.io/benchco"),
+        ("lever",        ja.scrape_lever,        "https://jobs.lever.co/benchco"),
+        ("workday",      ja.scrape_workday,      "https://benchco.wd3.myworkdayjobs.com/External/jobs"),
+        ("workday_html", ja.scrape_workday_html, "https://benchco.wd3.myworkdayjobs.com/External/jobs"),
+        ("html",         ja.scrape_html,         "https://careers.example.com/search"),
+    ]
+    per_scraper = [bench_scraper(name, fn, url, args.iterations) for name, fn, url in scrapers]
+
+    print(f"\n{'scraper':<14}{'calls/s':>10}{'postings/s':>12}{'per call':>10}{'peak KB':>10}")
+    for r in per_scraper:
+        print(f"{r['scraper']:<14}{r['calls_per_s']:>10}{r['postings_per_s']:>12}"
+              f"{r['postings_per_call']:>10}{r['peak_kb']:>10}")
+
+    before = adapter.requests
+    collect = bench_collect(args.companies, workdir)
+    collect["requests"] = adapter.requests - before
+    print(f"\ncollect_new_jobs on {collect['companies']} boards ({collect['requests']} requests, "
+          f"{args.latency:g} ms latency):")
+    print(f"  first run : {collect['first_run_s']:>7}s  {collect['first_run_new']:>6} new  "
+          f"peak {collect['first_run_peak_mb']} MB")
+    print(f"  repeat run: {collect['repeat_run_s']:>7}s  {collect['repeat_run_new']:>6} new  "
+          f"peak {collect['repeat_run_peak_mb']} MB")
+
+    if args.json:
+        args.json.write_text(json.dumps({"scrapers": per_scraper, "collect": collect,
+                                         "latency_ms": args.latency}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,97 +4,177 @@ Scrapes career pages of Toronto & Halifax asset management / fund admin companie
 detects NEW postings since yesterday, and emails a formatted digest via Gmail.
 """
 
-import os, json, re, hashlib, smtplib, time, logging
-from datetime import datetime, date
+import argparse, codecs, contextvars, os, json, re, hashlib, multiprocessing, random, signal, smtplib, socket, sqlite3, time, logging, threading, zlib
+from contextvars import ContextVar
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, date, timedelta, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.utils import parsedate_to_datetime
+from html import escape
 from pathlib import Path
+from string import Template
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+import lxml.etree
+import lxml.html
+
+try:
+    import yaml                      # optional: only needed for a YAML registry
+except ImportError:
+    yaml = None
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger(__name__)
 
 # ──────────────────────────────────────────────────────────────────────────────
-# COMPANY LIST  (name, city, careers_url, ats_type)
-# ats_type: "greenhouse" | "lever" | "workday" | "html"
+# COMPANY REGISTRY
+# Boards live in data/companies.json (or .yaml), one object per board:
+#   name, city, url, ats        required; ats: "greenhouse" | "lever" | "workday" | "html"
+#   every     crawl cadence, e.g. "1h", "6h", "1d" (default), "7d"
+#   selector  XPath for job-title links (html boards)
+#   delay     seconds between requests to this board's host
+#   location  regex a posting's location must match (postings without one are kept)
+# The file is re-read whenever it changes on disk.
 # ──────────────────────────────────────────────────────────────────────────────
-COMPANIES = [
-    # ── TORONTO ───────────────────────────────────────────────────────────────
-    # Bank-owned / Large
-    ("RBC Global Asset Management",          "Toronto", "https://jobs.rbc.com/ca/en/search-results?keywords=asset+management",                    "html"),
-    ("TD Asset Management",                  "Toronto", "https://jobs.td.com/en/search/#q=asset+management&orgIds=1466",                          "html"),
-    ("BMO Global Asset Management",          "Toronto", "https://jobs.bmo.com/ca/en/search-results?keywords=asset+management",                    "html"),
-    ("CIBC Asset Management",                "Toronto", "https://cibc.wd3.myworkdayjobs.com/CIBC/jobs",                                           "workday"),
-    ("1832 Asset Management / Dynamic",      "Toronto", "https://jobs.scotiabank.com/search/?q=asset+management",                                  "html"),
-    ("Manulife Investment Management",       "Toronto", "https://manulife.wd3.myworkdayjobs.com/MFCJOBS",                                          "workday"),
-    ("Sun Life / SLC Management",            "Toronto", "https://sunlife.wd3.myworkdayjobs.com/Experienced-EN/jobs",                               "workday"),
-    ("Canada Life Investment Management",    "Toronto", "https://www.canadalife.com/about-us/careers.html",                                        "html"),
-    # Pension / Institutional
-    ("CPP Investments",                      "Toronto", "https://boards.greenhouse.io/cppinvestments",                                             "greenhouse"),
-    ("Ontario Teachers' Pension Plan",       "Toronto", "https://otpp.wd3.myworkdayjobs.com/OTPP_External/jobs",                                   "workday"),
-    ("OMERS",                                "Toronto", "https://omers.wd3.myworkdayjobs.com/OMERS_External",                                      "workday"),
-    ("HOOPP",                                "Toronto", "https://hoopp.wd3.myworkdayjobs.com/HOOPP_Careers",                                       "workday"),
-    ("OPTrust",                              "Toronto", "https://optrust.wd3.myworkdayjobs.com/OPTrust",                                           "workday"),
-    # Independent boutiques
-    ("Brookfield Asset Management",          "Toronto", "https://brookfieldoam.wd5.myworkdayjobs.com/brookfield-careers",                          "workday"),
-    ("CI Global Asset Management",           "Toronto", "https://boards.greenhouse.io/cifinancialgrouptalentacquisition",                           "greenhouse"),
-    ("AGF Investments",                      "Toronto", "https://agf.wd3.myworkdayjobs.com/AGFCareers",                                            "workday"),
-    ("Fidelity Canada",                      "Toronto", "https://fidelity.wd3.myworkdayjobs.com/FidelityCanadaExternal",                           "workday"),
-    ("EdgePoint Wealth Management",          "Toronto", "https://www.edgepointwealth.com/en/about/careers",                                        "html"),
-    ("Beutel Goodman & Company",             "Toronto", "https://www.beutelgoodman.com/about/careers/",                                            "html"),
-    ("Fiera Capital Corporation",            "Toronto", "https://boards.greenhouse.io/fieracapital",                                               "greenhouse"),
-    ("Guardian Capital Group",               "Toronto", "https://guardiancapital.wd3.myworkdayjobs.com/Guardian_Careers",                          "workday"),
-    ("Caldwell Investment Management",       "Toronto", "https://www.caldwellinvestment.com/about/careers/",                                       "html"),
-    ("Burgundy Asset Management",            "Toronto", "https://www.burgundyasset.com/about-us/careers/",                                         "html"),
-    ("Invesco Canada",                       "Toronto", "https://invesco.wd1.myworkdayjobs.com/External/jobs",                                     "workday"),
-    ("BlackRock Canada",                     "Toronto", "https://blackrock.wd1.myworkdayjobs.com/BlackRock/jobs",                                  "workday"),
-    ("Brandes Investment Partners",          "Toronto", "https://www.brandes.com/careers",                                                         "html"),
-    ("Capital Group Canada",                 "Toronto", "https://capitalgroup.wd1.myworkdayjobs.com/Capital_Group/jobs",                           "workday"),
-    # Alternatives
-    ("Onex Corporation",                     "Toronto", "https://boards.greenhouse.io/onex",                                                       "greenhouse"),
-    ("Northleaf Capital Partners",           "Toronto", "https://boards.greenhouse.io/northleafcapital",                                           "greenhouse"),
-    ("Slate Asset Management",               "Toronto", "https://jobs.lever.co/slateasset",                                                        "lever"),
-    ("Sprott Asset Management",              "Toronto", "https://jobs.lever.co/sprott",                                                            "lever"),
-    ("Ninepoint Partners",                   "Toronto", "https://www.ninepoint.ca/en/about-ninepoint/careers/",                                    "html"),
-    ("Arrow Capital Management",             "Toronto", "https://www.arrow-capital.com/careers/",                                                  "html"),
-    ("Purpose Investments",                  "Toronto", "https://jobs.lever.co/purposeinvestments",                                                "lever"),
-    ("Fengate Asset Management",             "Toronto", "https://jobs.lever.co/fengate",                                                           "lever"),
-    ("3iQ Corp",                             "Toronto", "https://jobs.lever.co/3iq",                                                               "lever"),
-    ("RPIA (RP Investment Advisors)",        "Toronto", "https://rpia.ca/en/careers",                                                              "html"),
-    ("Wealthsimple",                         "Toronto", "https://jobs.lever.co/wealthsimple",                                                      "lever"),
-    ("Ewing Morris & Co.",                   "Toronto", "https://www.ewingmorris.com/careers",                                                     "html"),
-    # Fund Admin
-    ("SS&C Technologies",                    "Toronto", "https://www.ssctech.com/company/careers",                                                 "html"),
-    ("State Street (Canada)",                "Toronto", "https://statestreet.wd1.myworkdayjobs.com/External/jobs",                                 "workday"),
-    ("Northern Trust Canada",                "Toronto", "https://northerntrust.wd5.myworkdayjobs.com/Careers/jobs",                                "workday"),
-    ("CIBC Mellon",                          "Toronto", "https://www.cibcmellon.com/en/careers.html",                                              "html"),
-    ("Apex Fund Services",                   "Toronto", "https://boards.greenhouse.io/theapexgroup",                                               "greenhouse"),
-    ("Alter Domus",                          "Toronto", "https://jobs.alterdomus.com",                                                              "html"),
-    ("IQ-EQ",                               "Toronto", "https://boards.greenhouse.io/iqeq",                                                       "greenhouse"),
-    ("MUFG Investor Services",               "Toronto", "https://mufginvestorservices.wd1.myworkdayjobs.com/MUFG_Investor_Services",               "workday"),
-    ("Citco Fund Services",                  "Toronto", "https://citco.wd3.myworkdayjobs.com/CitcoCareers",                                        "workday"),
-    ("Maples Group",                         "Toronto", "https://jobs.maples.com",                                                                 "html"),
-    # ── HALIFAX ───────────────────────────────────────────────────────────────
-    ("Citco Fund Services (Halifax)",        "Halifax", "https://citco.wd3.myworkdayjobs.com/CitcoCareers",                                        "workday"),
-    ("SS&C Technologies (Halifax)",          "Halifax", "https://www.ssctech.com/company/careers",                                                 "html"),
-    ("MUFG Investor Services (Halifax)",     "Halifax", "https://mufginvestorservices.wd1.myworkdayjobs.com/MUFG_Investor_Services",               "workday"),
-    ("Butterfield Fund Services",            "Halifax", "https://www.butterfieldgroup.com/about-us/careers",                                       "html"),
-    ("Maitland Group (Halifax)",             "Halifax", "https://maitlandgroup.com/careers/",                                                      "html"),
-    ("NTT Data Canada",                      "Halifax", "https://www.nttdata.com/global/en/careers",                                               "html"),
-    ("SEAMARK Asset Management",             "Halifax", "https://www.seamark.ca/about/careers/",                                                   "html"),
-    ("EY Halifax",                           "Halifax", "https://eyglobal.yello.co/jobs?page=1",                                                   "html"),
-    ("KPMG Halifax",                         "Halifax", "https://home.kpmg/ca/en/home/careers.html",                                               "html"),
-    ("Deloitte Halifax",                     "Halifax", "https://apply.deloitte.com/careers/SearchJobs?3_116_3=4183",                              "html"),
-    ("RBC Wealth Management (Halifax)",      "Halifax", "https://jobs.rbc.com/ca/en/search-results?keywords=halifax",                              "html"),
-    ("TD Wealth (Halifax)",                  "Halifax", "https://jobs.td.com/en/search/#q=halifax&orgIds=1466",                                    "html"),
-    ("Scotia Wealth (Halifax)",              "Halifax", "https://jobs.scotiabank.com/search/?q=halifax",                                           "html"),
-    ("National Bank (Halifax)",              "Halifax", "https://jobs.nbc.ca/search/?q=halifax",                                                   "html"),
-    ("Medavie Blue Cross",                   "Halifax", "https://www.medavie.ca/en/careers/",                                                      "html"),
-    ("Marsh McLennan (Halifax)",             "Halifax", "https://marsh.wd1.myworkdayjobs.com/Marsh_Careers/jobs",                                  "workday"),
-    ("Canaccord Genuity (Halifax)",          "Halifax", "https://boards.greenhouse.io/canaccordgenuity",                                           "greenhouse"),
-]
+
+COMPANIES_PATH = Path(os.environ.get("COMPANIES_FILE", "data/companies.json"))
+CADENCE_UNITS  = {"m": 1 / 60, "h": 1, "d": 24, "w": 24 * 7}
+
+
+@dataclass(frozen=True, slots=True)
+class Board:
+    name: str
+    city: str
+    url: str
+    ats: str
+    every_hours: float = 24.0
+    selector: str | None = None
+    delay: float | None = None
+    location: str | None = None
+
+
+def parse_cadence(value) -> float:
+    """'6h' / '1d' / '2w' / '30m' (or a bare number of hours) → hours."""
+    if isinstance(value, (int, float)):
+        hours = float(value)
+    else:
+        m = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([mhdw])\s*', str(value).lower())
+        if not m:
+            raise ValueError(f"bad cadence {value!r} (use e.g. '6h', '1d', '7d')")
+        hours = float(m.group(1)) * CADENCE_UNITS[m.group(2)]
+    if hours <= 0:
+        raise ValueError(f"cadence must be positive, got {value!r}")
+    return hours
+
+
+def parse_board(entry: dict) -> Board:
+    unknown = set(entry) - {"name", "city", "url", "ats", "every", "selector", "delay", "location"}
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(sorted(unknown))}")
+    for field in ("name", "city", "url", "ats"):
+        if not str(entry.get(field, "")).strip():
+            raise ValueError(f"missing {field!r}")
+    if entry["ats"] not in SCRAPERS:
+        raise ValueError(f"unknown ats {entry['ats']!r} (expected one of {', '.join(SCRAPERS)})")
+    if not re.match(r'https?://[^/\s]+', entry["url"]):
+        raise ValueError(f"url must be http(s): {entry['url']!r}")
+    if entry.get("selector"):
+        lxml.etree.XPath(entry["selector"])             # raises XPathSyntaxError
+    if entry.get("location"):
+        re.compile(entry["location"])
+    delay = entry.get("delay")
+    if delay is not None and float(delay) < 0:
+        raise ValueError("delay must be >= 0")
+    return Board(
+        name=entry["name"].strip(),
+        city=entry["city"].strip(),
+        url=entry["url"].strip(),
+        ats=entry["ats"],
+        every_hours=parse_cadence(entry.get("every", "1d")),
+        selector=entry.get("selector") or None,
+        delay=float(delay) if delay is not None else None,
+        location=entry.get("location") or None,
+    )
+
+
+def load_companies(path: Path) -> list[Board]:
+    """Read and validate the registry; exact duplicates are dropped with a warning."""
+    with open(path) as f:
+        if path.suffix in (".yaml", ".yml"):
+            if yaml is None:
+                raise ValueError(f"{path} is YAML but PyYAML is not installed (pip install pyyaml)")
+            entries = yaml.safe_load(f) or []
+        else:
+            entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a list of boards")
+
+    boards, errors, keys = [], [], set()
+    for i, entry in enumerate(entries, 1):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("expected an object")
+            board = parse_board(entry)
+        except Exception as e:
+            errors.append(f"  entry {i} ({entry.get('name', '?') if isinstance(entry, dict) else entry!r}): {e}")
+            continue
+        key = (board.name.lower(), board.city.lower(), board_key(board.url, board.ats))
+        if key in keys:
+            log.warning(f"{path}: dropping duplicate entry {i} ({board.name}, {board.city})")
+            continue
+        keys.add(key)
+        boards.append(board)
+    if errors:
+        raise ValueError(f"{path}: {len(errors)} invalid board(s):\n" + "\n".join(errors))
+    return boards
+
+
+class CompanyRegistry:
+    """The board list, reloaded from disk whenever the file's mtime changes.
+
+    A broken edit keeps the previously loaded boards (once there are some),
+    so a long-running process survives a typo in the file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._mtime: float | None = None
+        self._boards: list[Board] = []
+        self._lock = threading.Lock()
+
+    def reload_if_changed(self) -> bool:
+        mtime = self.path.stat().st_mtime
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            try:
+                boards = load_companies(self.path)
+            except Exception as e:
+                if self._mtime is None:
+                    raise
+                log.error(f"Keeping previous company list: {e}")
+                self._mtime = mtime
+                return False
+            self._boards, self._mtime = boards, mtime
+        log.info(f"Loaded {len(boards)} board(s) from {self.path}")
+        return True
+
+    @property
+    def boards(self) -> list[Board]:
+        self.reload_if_changed()
+        return self._boards
+
+
+registry = CompanyRegistry(COMPANIES_PATH)
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -102,18 +182,576 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+# ──────────────────────────────────────────────────────────────────────────────
+# METRICS
+# Every board scrape gets a BoardMetrics; fetch() and the connection classes
+# below add to whichever one is active in the current context. One JSONL
+# record per board is written to metrics/ at the end of the run.
+# ──────────────────────────────────────────────────────────────────────────────
+
+METRICS_DIR   = Path("metrics")
+METRICS_TOP_N = int(os.environ.get("METRICS_TOP_N", "10"))
+
+
+class BoardMetrics:
+    """Timings (seconds), sizes and counts for one board in one run."""
+
+    TIMERS = ("wait_s", "dns_s", "connect_s", "ttfb_s", "download_s", "network_s", "backoff_s", "parse_s")
+
+    def __init__(self, board: str, company: str, ats: str):
+        self._lock = threading.Lock()
+        self.record = {"board": board, "company": company, "ats": ats, "status": "ok",
+                       "requests": 0, "connections": 0, "bytes": 0,
+                       **{t: 0.0 for t in self.TIMERS},
+                       "total_s": 0.0, "pages": 0, "jobs": 0, "new": 0, "closed": 0, "errors": []}
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                self.record[field] += amount
+
+    def error(self, message: str):
+        with self._lock:
+            self.record["errors"].append(message[:300])
+
+    def finish(self, status: str, total_s: float, jobs: int):
+        """Timers are summed over every request and page, so with pages fetched
+        concurrently they can add up to more than total_s."""
+        with self._lock:
+            r = self.record
+            r.update(status=status, total_s=total_s, jobs=jobs)
+            for field in (*self.TIMERS, "total_s"):
+                r[field] = round(r[field], 4)
+
+
+_board_metrics: ContextVar[BoardMetrics | None] = ContextVar("board_metrics", default=None)
+
+
+def metric(**amounts):
+    m = _board_metrics.get()
+    if m is not None:
+        m.add(**amounts)
+
+
+def metric_error(e) -> None:
+    m = _board_metrics.get()
+    if m is not None:
+        m.error(str(e))
+
+
+# Setup time of each new connection, as dns_s (name lookup) and connect_s
+# (TCP + TLS). Keep-alive requests reuse a pooled connection and don't show
+# up here.
+
+class _TimedConnection:
+    _dns_s = 0.0
+
+    def _new_conn(self):
+        # Resolve here so the lookup is timed on its own, then connect to each
+        # address in turn as urllib3's create_connection would.
+        t0 = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(
+                self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)))
+        except OSError:
+            addresses = [self._dns_host]        # let urllib3 raise its own resolution error
+        self._dns_s = time.perf_counter() - t0
+        metric(dns_s=self._dns_s)
+        host = self._dns_host
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        metric(connect_s=time.perf_counter() - t0 - self._dns_s, connections=1)
+
+
+class _TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def write_metrics(records: list[dict], started: datetime) -> Path:
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    path = METRICS_DIR / f"run-{started:%Y%m%d-%H%M%S}.jsonl"
+    with open(path, "w") as f:
+        for rec in records:
+            f.write(json.dumps(rec) + "\n")
+    return path
+
+
+def log_slowest(records: list[dict], n: int = METRICS_TOP_N):
+    if not records:
+        return
+    log.info(f"Slowest {min(n, len(records))} board(s):")
+    log.info(f"  {'total':>7} {'network':>8} {'parse':>7} {'wait':>7} {'KB':>7} {'jobs':>5} {'new':>4}  board")
+    for r in sorted(records, key=lambda r: r["total_s"], reverse=True)[:n]:
+        log.info(f"  {r['total_s']:7.2f} {r['network_s']:8.2f} {r['parse_s']:7.2f} {r['wait_s']:7.2f} "
+                 f"{r['bytes'] / 1024:7.0f} {r['jobs']:5d} {r['new']:4d}  {r['company']} [{r['status']}]")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# FETCH ENGINE
+# Boards are scraped on a thread pool; the polite delay is applied per host,
+# so boards on different hosts overlap while repeat hits on one host are spaced.
+# ──────────────────────────────────────────────────────────────────────────────
+
+MAX_WORKERS = int(os.environ.get("SCRAPE_CONCURRENCY", "8"))     # boards in flight at once
+HOST_DELAY  = float(os.environ.get("PER_HOST_DELAY", "0.8"))     # seconds between hits on one host
+
+FETCH_RETRIES     = int(os.environ.get("FETCH_RETRIES", "2"))       # extra attempts on 429/5xx/network errors
+BACKOFF_BASE      = 1.0                                              # seconds; doubles per attempt, full jitter
+BACKOFF_CAP       = 30.0
+BREAKER_THRESHOLD = int(os.environ.get("BREAKER_THRESHOLD", "3"))   # consecutive failing runs before a board is skipped
+BREAKER_COOLDOWN  = float(os.environ.get("BREAKER_COOLDOWN_HOURS", "72"))
+RUN_TIME_BUDGET   = float(os.environ.get("RUN_TIME_BUDGET", "900"))  # seconds for the whole scrape; 0 = unlimited
+
+# Multi-tenant ATS domains: every tenant on a shard shares the same servers,
+# so politeness is keyed on the shard (e.g. wd3.myworkdayjobs.com).
+SHARED_HOSTS = ("myworkdayjobs.com",)
+
+
+def host_key(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    for shared in SHARED_HOSTS:
+        if host.endswith("." + shared):
+            return ".".join(host.split(".")[-3:])
+    return host
+
+
+class HostRateLimiter:
+    """Hands out request slots per host, at least `delay` seconds apart."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next: dict[str, float] = {}
+        self._delays: dict[str, float] = {}
+
+    def set_delay(self, url: str, delay: float):
+        """Override the delay for one host (a board's `delay` in the registry)."""
+        with self._lock:
+            self._delays[host_key(url)] = delay
+
+    def wait(self, url: str):
+        host = host_key(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self._delays.get(host, self.delay)
+        if slot > now:
+            time.sleep(slot - now)
+
+
+limiter = HostRateLimiter(HOST_DELAY)
+
+# One keep-alive session for the whole run; the adapter keeps a connection
+# pool per host so repeat requests skip the TCP+TLS handshake.
+session = requests.Session()
+session.headers.update(HEADERS)
+_adapter = HTTPAdapter(pool_connections=64, pool_maxsize=max(MAX_WORKERS, 10))
+_adapter.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+
+
+class NotModified(Exception):
+    """The server answered a conditional GET with 304 — nothing changed."""
+
+
+class ValidatorCache:
+    """ETag / Last-Modified validators per URL, persisted next to the seen store."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        if path.exists():
+            with open(path) as f:
+                self._entries = json.load(f)
+
+    def headers_for(self, url: str) -> dict:
+        with self._lock:
+            entry = self._entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @staticmethod
+    def validators(r: requests.Response) -> dict:
+        return {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+
+    def remember(self, url: str, entry: dict):
+        """Call only once the postings from that response have been diffed:
+        a stored validator turns the next fetch into a 304 that skips them."""
+        with self._lock:
+            if entry["etag"] or entry["last_modified"]:
+                self._entries[url] = {k: v for k, v in entry.items() if v}
+            else:
+                self._entries.pop(url, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            with open(self.path, "w") as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+
+
+HTTP_CACHE_PATH = Path("data/http_cache.json")
+http_cache = ValidatorCache(HTTP_CACHE_PATH)
+
+
+class HostUnavailable(Exception):
+    """The run's time budget is spent."""
+
+
+class CircuitBreaker:
+    """Per-board failure memory that survives between runs.
+
+    A board fails a run when its scrape errors without returning any
+    postings: requests that still fail after retries, and dead boards
+    answering 404/410 alike. After BREAKER_THRESHOLD failing runs in a row
+    it is skipped for the cooldown, then tried again; one success resets
+    it. Keyed by board_key, so one broken Greenhouse or Lever board doesn't
+    take the rest of that shared API host down with it.
+    """
+
+    def __init__(self, path: Path, threshold: int, cooldown_hours: float):
+        self.path = path
+        self.threshold = threshold
+        self.cooldown = timedelta(hours=cooldown_hours)
+        self._lock = threading.Lock()
+        self._boards: dict[str, dict] = {}
+        if path.exists():
+            with open(path) as f:
+                self._boards = json.load(f)
+
+    def open_until(self, board: str) -> str | None:
+        """When the board's cooldown ends, while it is being skipped."""
+        with self._lock:
+            until = self._boards.get(board, {}).get("open_until")
+        if until and datetime.now(timezone.utc) < datetime.fromisoformat(until):
+            return until
+        return None
+
+    def success(self, board: str):
+        with self._lock:
+            self._boards.pop(board, None)
+
+    def failure(self, board: str):
+        with self._lock:
+            entry = self._boards.setdefault(board, {"failures": 0})
+            entry["failures"] += 1
+            if entry["failures"] >= self.threshold:
+                entry["open_until"] = (datetime.now(timezone.utc) + self.cooldown).isoformat(timespec="seconds")
+                log.warning(f"  Circuit open for {board} until {entry['open_until']}")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            with open(self.path, "w") as f:
+                json.dump(self._boards, f, indent=2, sort_keys=True)
+
+
+BOARD_HEALTH_PATH = Path("data/board_health.json")
+breaker = CircuitBreaker(BOARD_HEALTH_PATH, BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+
+class RunBudget:
+    """Wall-clock deadline for the scrape; requests are clipped or refused past it."""
+
+    def __init__(self):
+        self.deadline: float | None = None
+
+    def start(self, seconds: float):
+        self.deadline = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> float:
+        return float("inf") if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def wait_time(self, grace: float) -> float | None:
+        """Seconds to wait on a result: up to the deadline plus `grace`, or forever."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline + grace - time.monotonic())
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise HostUnavailable("run time budget exhausted")
+
+
+budget = RunBudget()
+
+
+def retry_after(r: requests.Response) -> float | None:
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch(url: str, conditional: bool = False, method: str = "GET", timeout: float = 20, **kwargs) -> requests.Response:
+    """Request `url` once its host's next polite slot comes up.
+
+    429/5xx and network errors are retried with jittered exponential backoff
+    (honouring Retry-After) within the run budget; a request that still fails
+    raises, and scrape_board counts the failure against the board.
+
+    With `conditional=True` the cached validators are sent and a 304 raises
+    NotModified; scrapers hand new validators back on their Postings, and the
+    main loop records them via http_cache.remember() after the diff.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    if conditional:
+        headers.update(http_cache.headers_for(url))
+    for attempt in range(FETCH_RETRIES + 1):
+        t0 = time.perf_counter()
+        limiter.wait(url)
+        t1 = time.perf_counter()
+        metric(wait_s=t1 - t0)
+        budget.check()
+        try:
+            r = session.request(method, url, headers=headers, timeout=min(timeout, budget.remaining()), **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metric(requests=1, network_s=time.perf_counter() - t1)
+            error, delay = e, None
+        else:
+            # ttfb_s is r.elapsed: request sent → headers parsed, including
+            # connection setup when a new connection had to be opened.
+            network = time.perf_counter() - t1
+            ttfb = r.elapsed.total_seconds()
+            metric(requests=1, network_s=network, ttfb_s=ttfb,
+                   download_s=max(0.0, network - ttfb), bytes=len(r.content))
+            if r.status_code != 429 and r.status_code < 500:
+                if r.status_code in (404, 410):
+                    # A removed board; its error page must not parse as "no openings".
+                    raise requests.HTTPError(f"{r.status_code} from {url}", response=r)
+                if r.status_code == 304:
+                    raise NotModified(url)
+                return r
+            error, delay = requests.HTTPError(f"{r.status_code} from {url}", response=r), retry_after(r)
+        if delay is None:
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        if attempt == FETCH_RETRIES or delay >= budget.remaining():
+            break
+        log.info(f"  Retrying {url} in {delay:.1f}s ({error})")
+        metric(backoff_s=delay)
+        time.sleep(delay)
+    raise error
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # ATS SCRAPERS
 # ──────────────────────────────────────────────────────────────────────────────
 
 def job_id(title, url):
+    """Legacy id: hash of the raw title and URL. Still checked so history from
+    before canonical ids doesn't re-alert."""
     raw = f"{title}|{url}".lower().strip()
     return hashlib.md5(raw.encode()).hexdigest()[:12]
 
 
-def scrape_greenhouse(url: str) -> list[dict]:
+# Query parameters that only track where a click came from.
+TRACKING_PARAMS = re.compile(
+    r'^(utm_\w+|gclid|fbclid|msclkid|mc_cid|mc_eid|_ga|_gl|ref|refid|referrer|src|source|'
+    r'trk|trackingid|gh_src|lever-source|lever-origin|lever-via|codes|ss|iis|iisn)$',
+    re.I
+)
+
+
+def canonical_url(url: str) -> str:
+    """Lower-case scheme/host, no default port, fragment or tracking params,
+    sorted query, no trailing slash."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if parts.port and not (parts.scheme, parts.port) in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(k))
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def job_keys(j: dict, board: str) -> tuple[str, str]:
+    """(primary id, legacy id) of a posting.
+
+    The primary id is the ATS's own posting id scoped to the board when the
+    scraper found one (Greenhouse/Lever ids, Workday requisition numbers),
+    otherwise the title plus the canonical URL.
+    """
+    if j.get("native_id"):
+        raw = f"{board}|{j['native_id']}"
+    else:
+        raw = f"{j['title']}|{canonical_url(j['url'])}"
+    primary = hashlib.md5(raw.lower().strip().encode()).hexdigest()[:12]
+    return primary, job_id(j["title"], j["url"])
+
+
+def is_known(j: dict, board: str, seen) -> bool:
+    primary, legacy = job_keys(j, board)
+    return primary in seen or legacy in seen
+
+
+_MINHASH_PRIME = (1 << 31) - 1          # keeps every product in a machine word
+_minhash_rng = random.Random(1729)       # fixed seed: signatures are stable between runs
+_MINHASH_COEFFS = [(_minhash_rng.randrange(1, _MINHASH_PRIME), _minhash_rng.randrange(0, _MINHASH_PRIME))
+                   for _ in range(32)]
+
+
+class TitleIndex:
+    """MinHash/LSH index over character-trigram sets of job titles.
+
+    Lookups only compare against titles sharing an LSH bucket, so finding
+    near-duplicates among n postings costs ~O(n) instead of O(n²). Candidates
+    are confirmed with the exact trigram Jaccard similarity. Scopes with only
+    a few titles are scanned directly; the buckets are built once one grows
+    past LINEAR_MAX, since signing a title costs more than a short scan.
+    """
+
+    BANDS, ROWS = 8, 4                      # 8 × 4 = 32 hash functions; ~0.6 similarity is the LSH knee
+    LINEAR_MAX = 64
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._buckets: dict[tuple, list[int]] = {}
+        self._items: list[tuple[frozenset, object]] = []
+        self._scopes: dict[str, list[int]] = {}
+        self._signed: set[str] = set()
+        self._grams: dict[tuple, tuple] = {}
+
+    @staticmethod
+    def shingles(title: str) -> frozenset:
+        t = " " + re.sub(r'[^a-z0-9]+', " ", title.lower()).strip() + " "
+        return frozenset(t[i:i + 3] for i in range(len(t) - 2))
+
+    @staticmethod
+    def _signature(grams: frozenset) -> list[int]:
+        hashes = [zlib.crc32(g.encode()) for g in grams] or [0]
+        return [min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in _MINHASH_COEFFS]
+
+    def _bucket_keys(self, scope: str, grams: frozenset) -> list[tuple]:
+        key = (scope, grams)
+        if key not in self._grams:
+            sig = self._signature(grams)
+            self._grams[key] = [(scope, band, *sig[band * self.ROWS:(band + 1) * self.ROWS])
+                                for band in range(self.BANDS)]
+        return self._grams[key]
+
+    def _index(self, scope: str, idx: int):
+        for bucket in self._bucket_keys(scope, self._items[idx][0]):
+            self._buckets.setdefault(bucket, []).append(idx)
+
+    def find(self, scope: str, title: str):
+        """Payload of an indexed near-duplicate of `title` within `scope`, or None."""
+        grams = self.shingles(title)
+        if scope in self._signed:
+            candidates = dict.fromkeys(i for bucket in self._bucket_keys(scope, grams)
+                                       for i in self._buckets.get(bucket, ()))
+        else:
+            candidates = self._scopes.get(scope, ())
+        for idx in candidates:
+            other, payload = self._items[idx]
+            if len(grams & other) / max(1, len(grams | other)) >= self.threshold:
+                return payload
+        return None
+
+    def add(self, scope: str, title: str, payload):
+        idx = len(self._items)
+        self._items.append((self.shingles(title), payload))
+        members = self._scopes.setdefault(scope, [])
+        members.append(idx)
+        if scope in self._signed:
+            self._index(scope, idx)
+        elif len(members) > self.LINEAR_MAX:
+            self._signed.add(scope)
+            for i in members:
+                self._index(scope, i)
+
+
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.9"))   # trigram Jaccard; 0 disables
+
+
+MULTI_TENANT_HOSTS = ("greenhouse.io", "lever.co")     # employer = first path segment
+
+
+LEVEL_TOKENS = re.compile(r'\b(\d+|i{1,3}|iv|v)\b', re.I)
+
+
+def dedup_scope(j: dict) -> str:
+    """Postings can only duplicate each other within one employer (the same
+    careers host, or the same board on a multi-tenant ATS host) and with the
+    same numbers / levels in the title — "Analyst II" is not "Analyst III"."""
+    parts = urlsplit(j["url"])
+    host = re.sub(r'^(www|jobs|careers|boards|apply)\.', "", (parts.hostname or "").lower())
+    if host.endswith(MULTI_TENANT_HOSTS):
+        host += "/" + parts.path.strip("/").split("/")[0].lower()
+    levels = sorted(t.lower() for t in LEVEL_TOKENS.findall(j["title"]))
+    return host + "|" + " ".join(levels)
+
+
+def drop_near_duplicates(new_jobs: list[dict], threshold: float = NEAR_DUP_THRESHOLD) -> list[dict]:
+    """Fold postings whose title nearly matches an earlier one from the same
+    employer into it (e.g. one role posted under two search pages or cities)."""
+    if not threshold:
+        return new_jobs
+    index = TitleIndex(threshold)
+    kept = []
+    for j in new_jobs:
+        scope = dedup_scope(j)
+        first = index.find(scope, j["title"])
+        loc, first_loc = j.get("location", ""), first.get("location", "") if first else ""
+        if first is not None and (not loc or not first_loc or loc.lower() == first_loc.lower()):
+            if j["city"] != first["city"] and j["city"] not in first.setdefault("also_in", []):
+                first["also_in"].append(j["city"])
+            continue
+        index.add(scope, j["title"], j)
+        kept.append(j)
+    if len(kept) < len(new_jobs):
+        log.info(f"Folded {len(new_jobs) - len(kept)} near-duplicate posting(s) into earlier ones")
+    return kept
+
+
+class Postings(list):
+    """Scraped postings; `complete` is False when a scraper stopped early.
+
+    `validators` are (url, ETag/Last-Modified) pairs from the responses. They
+    are stored only after the main loop has diffed the postings, so a board
+    abandoned by the run time budget isn't answered with a 304 next time.
+    """
+    complete = True
+    validators = ()
+
+
+def scrape_greenhouse(url: str, seen=None) -> list[dict]:
     """Public Greenhouse JSON API."""
-    jobs = []
+    jobs = Postings()
     try:
         # Extract board token from URL
         m = re.search(r'greenhouse\.io/([^/?\s]+)', url)
@@ -121,29 +759,37 @@ def scrape_greenhouse(url: str) -> list[dict]:
             return []
         token = m.group(1)
         api = f"https://boards-api.greenhouse.io/v1/boards/{token}/jobs?content=true"
-        r = requests.get(api, headers=HEADERS, timeout=15)
+        r = fetch(api, conditional=True, timeout=15)
+        t0 = time.perf_counter()
         data = r.json()
         for j in data.get("jobs", []):
             jobs.append({
                 "title": j.get("title", ""),
                 "url":   j.get("absolute_url", url),
                 "location": j.get("location", {}).get("name", ""),
+                "native_id": str(j.get("id", "")),
             })
+        metric(parse_s=time.perf_counter() - t0)
+        jobs.validators = ((api, ValidatorCache.validators(r)),)
+    except NotModified:
+        raise
     except Exception as e:
         log.warning(f"Greenhouse error for {url}: {e}")
+        metric_error(e)
     return jobs
 
 
-def scrape_lever(url: str) -> list[dict]:
+def scrape_lever(url: str, seen=None) -> list[dict]:
     """Public Lever JSON API."""
-    jobs = []
+    jobs = Postings()
     try:
         m = re.search(r'lever\.co/([^/?\s]+)', url)
         if not m:
             return []
         token = m.group(1)
         api = f"https://api.lever.co/v0/postings/{token}?mode=json"
-        r = requests.get(api, headers=HEADERS, timeout=15)
+        r = fetch(api, conditional=True, timeout=15)
+        t0 = time.perf_counter()
         data = r.json()
         for j in data:
             loc = j.get("categories", {}).get("location", "")
@@ -151,72 +797,434 @@ def scrape_lever(url: str) -> list[dict]:
                 "title":    j.get("text", ""),
                 "url":      j.get("hostedUrl", url),
                 "location": loc,
+                "native_id": j.get("id", ""),
             })
+        metric(parse_s=time.perf_counter() - t0)
+        jobs.validators = ((api, ValidatorCache.validators(r)),)
+    except NotModified:
+        raise
     except Exception as e:
         log.warning(f"Lever error for {url}: {e}")
+        metric_error(e)
     return jobs
 
 
-def scrape_workday(url: str) -> list[dict]:
-    """Workday careers page – parse visible job titles via HTML."""
+WORKDAY_URL = re.compile(
+    r'https?://(?P<host>(?P<tenant>[^./]+)\.wd\d+\.myworkdayjobs\.com)'
+    r'/(?:[a-z]{2}-[A-Z]{2}/)?(?P<site>[^/?#]+)'
+)
+WORKDAY_PAGE_SIZE = 20      # the cxs endpoint refuses anything larger
+WORKDAY_MAX_PAGES = 50
+
+
+def parse_posted_on(text: str, today: date) -> str:
+    """'Posted Today' / 'Posted 3 Days Ago' / 'Posted 30+ Days Ago' → ISO date."""
+    t = text.lower()
+    if "today" in t:
+        return str(today)
+    if "yesterday" in t:
+        return str(today - timedelta(days=1))
+    m = re.search(r'(\d+)\+?\s*day', t)
+    return str(today - timedelta(days=int(m.group(1)))) if m else ""
+
+
+def workday_location_facets(facets: list[dict], pattern: str) -> dict[str, list[str]]:
+    """Ids of the location facet values whose name matches `pattern`, keyed by
+    facet parameter — ready to send as the search's appliedFacets."""
+    applied: dict[str, list[str]] = {}
+
+    def walk(nodes, param):
+        for node in nodes or []:
+            if "values" in node:
+                walk(node["values"], node.get("facetParameter") or param)
+            elif (param and "location" in param.lower() and node.get("id")
+                  and re.search(pattern, node.get("descriptor", ""), re.I)):
+                applied.setdefault(param, []).append(node["id"])
+
+    walk(facets, None)
+    return applied
+
+
+def scrape_workday(url: str, seen=None, location: str | None = None) -> list[dict]:
+    """Workday tenant JSON search API (cxs), newest first, paged server-side.
+
+    With `location` (the registry rows' location regexes), the search is
+    narrowed to the tenant's location facet values matching it, so global
+    tenants only return the postings for our cities. Stops after the first
+    page made up entirely of already-seen postings; falls back to the HTML
+    page when the URL isn't a standard tenant URL.
+    """
+    m = WORKDAY_URL.match(url)
+    if not m:
+        return scrape_workday_html(url)
+    host, tenant, site = m.group("host", "tenant", "site")
+    api = f"https://{host}/wday/cxs/{tenant}/{site}/jobs"
+    board = board_key(url, "workday")
+    today = date.today()
+    jobs = Postings()
+    try:
+        facets = {}
+        if location:
+            r = fetch(api, method="POST", json={"appliedFacets": {}, "limit": 1, "offset": 0, "searchText": ""},
+                      timeout=20, headers={"Accept": "application/json"})
+            r.raise_for_status()
+            facets = workday_location_facets(r.json().get("facets", []), location)
+            if not facets:
+                log.info(f"  {url}: no location facet matches {location!r}; filtering postings by their location")
+        total = None
+        for page in range(WORKDAY_MAX_PAGES):
+            payload = {"appliedFacets": facets, "limit": WORKDAY_PAGE_SIZE,
+                       "offset": page * WORKDAY_PAGE_SIZE, "searchText": ""}
+            r = fetch(api, method="POST", json=payload, timeout=20,
+                      headers={"Accept": "application/json"})
+            r.raise_for_status()
+            t0 = time.perf_counter()
+            data = r.json()
+            if total is None:
+                total = data.get("total", 0)   # only reliable on the first page
+            postings = data.get("jobPostings", [])
+            batch = []
+            for j in postings:
+                title = j.get("title", "")
+                path = j.get("externalPath", "")
+                if not title:
+                    continue
+                req = re.search(r'_([A-Z]*-?\d+(?:-\d+)?)$', path)
+                where = j.get("locationsText", "")
+                if facets and re.fullmatch(r'\d+ Locations?', where):
+                    where = ""      # matched the facet through one of its locations; don't filter it again
+                batch.append({
+                    "title":    title,
+                    "url":      f"https://{host}/{site}{path}" if path else url,
+                    "location": where,
+                    "posted":   parse_posted_on(j.get("postedOn", ""), today),
+                    "native_id": next(iter(j.get("bulletFields") or []), "") or (req.group(1) if req else ""),
+                })
+            metric(parse_s=time.perf_counter() - t0)
+            jobs.extend(batch)
+            if len(postings) < WORKDAY_PAGE_SIZE or (total and len(jobs) >= total):
+                break
+            if seen is not None and batch and all(is_known(b, board, seen) for b in batch):
+                jobs.complete = False
+                break
+        else:
+            log.info(f"  {url}: stopped at the {WORKDAY_MAX_PAGES}-page limit")
+            jobs.complete = False       # postings past the limit weren't read, not closed
+    except Exception as e:
+        log.warning(f"Workday API error for {url}: {e} — falling back to HTML")
+        metric_error(e)
+        jobs = Postings(scrape_workday_html(url))
+        jobs.complete = False       # the HTML page only shows the first few postings
+    return jobs
+
+
+# ── HTML parsing ─────────────────────────────────────────────────────────────
+# Pages are parsed from the raw response bytes with lxml, and only the nodes
+# we actually want (anchors, job containers) are pulled out via XPath, so no
+# Python objects are built for the rest of the document.
+
+JOB_KEYWORDS = re.compile(
+    r'(analyst|manager|associate|director|officer|specialist|advisor|engineer|'
+    r'developer|coordinator|consultant|accountant|portfolio|research|compliance|'
+    r'operations|quantitative|risk|fixed.income|equity|fund|investment|admin)',
+    re.I
+)
+JOB_CONTAINERS = "//h3 | //h4 | //*[contains(@class, 'job') or contains(@class, 'position')]"
+
+def html_encoding(content: bytes, content_type: str = "") -> str:
+    """Charset from the Content-Type header, else a <meta> tag, else UTF-8.
+
+    Labels that aren't a known codec (servers send "utf8mb4", "none", …) are
+    skipped, and known ones are normalized to the codec's canonical name.
+    """
+    candidates = [m.group(1) for m in re.finditer(r'charset=["\']?([\w-]+)', content_type, re.I)]
+    candidates += [m.group(1).decode("ascii") for m in
+                   re.finditer(rb'<meta[^>]+charset=["\']?([\w-]+)', content[:2048], re.I)]
+    for label in candidates:
+        try:
+            return codecs.lookup(label).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+def parse_html(content: bytes, encoding: str = "utf-8"):
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding)
+    except LookupError:                 # a codec Python knows but libxml2 doesn't
+        parser = lxml.html.HTMLParser()
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+def node_text(el, sep: str = " ") -> str:
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
+
+
+def absolute(href: str, url: str) -> str:
+    if href.startswith("http"):
+        return href
+    base = re.match(r'(https?://[^/]+)', url)
+    return (base.group(1) if base else "") + href
+
+
+def extract_html_jobs(content: bytes, url: str, encoding: str = "utf-8", xpath: str | None = None) -> list[dict]:
+    """Likely job-title links on a careers page (pure function of the page bytes)."""
+    return _jobs_from_doc(parse_html(content, encoding), url, xpath)
+
+
+def _jobs_from_doc(doc, url: str, xpath: str | None) -> list[dict]:
     jobs = []
+    if xpath:
+        for a in doc.xpath(xpath):
+            text = node_text(a)
+            if 5 <= len(text) <= 120:
+                jobs.append({"title": text, "url": absolute(a.get("href", ""), url) or url, "location": ""})
+        if jobs:
+            return jobs
+
+    # Look for anchors whose text looks like a job title
+    titles_seen = set()
+    for a in doc.iterfind(".//a[@href]"):
+        text = node_text(a)
+        if len(text) < 5 or len(text) > 120:
+            continue
+        if not JOB_KEYWORDS.search(text):
+            continue
+        key = text.lower()[:60]
+        if key in titles_seen:
+            continue
+        titles_seen.add(key)
+        jobs.append({"title": text, "url": absolute(a.get("href"), url), "location": ""})
+    # If nothing found via links, try common job-list containers
+    if not jobs:
+        for tag in doc.xpath(JOB_CONTAINERS):
+            text = node_text(tag)
+            if JOB_KEYWORDS.search(text) and 5 < len(text) < 120:
+                jobs.append({"title": text, "url": url, "location": ""})
+    return jobs
+
+
+# Pagination of HTML result lists. Query parameters that page through a
+# listing, with the value of the first page.
+PAGE_PARAMS = {"page": 1, "pg": 1, "p": 1, "pagenumber": 1, "pagenum": 1,
+               "offset": 0, "start": 0, "startrow": 0, "from": 0, "skip": 0}
+NEXT_LABEL  = re.compile(r'^(next( page)?|›|»|>|→)$', re.I)
+
+HTML_MAX_PAGES  = int(os.environ.get("HTML_MAX_PAGES", "20"))     # per board, first page included
+HTML_PAGE_BATCH = int(os.environ.get("HTML_PAGE_BATCH", "4"))     # later pages fetched at once
+PARSE_PROCESSES = int(os.environ.get("PARSE_PROCESSES", str(min(4, os.cpu_count() or 1))))   # 0 = parse in-thread
+PARSE_OFFLOAD_BYTES = 64 * 1024     # smaller pages parse faster than the round trip to a worker
+
+
+def pagination_links(doc, url: str) -> tuple[str | None, list[str]]:
+    """The page's rel=next / "Next" link, and its links to other pages of the same listing."""
+    here = urlsplit(url)
+    nxt = None
+    for el in doc.xpath("//link[@rel='next'][@href] | //a[@rel='next'][@href]"):
+        nxt = urljoin(url, el.get("href"))
+        break
+    pages = []
+    for a in doc.iterfind(".//a[@href]"):
+        href = urljoin(url, a.get("href"))
+        parts = urlsplit(href)
+        if parts.netloc != here.netloc:
+            continue
+        if nxt is None and (NEXT_LABEL.match(node_text(a)) or "next" in (a.get("aria-label") or "").lower()):
+            nxt = href
+        if parts.path == here.path and any(k.lower() in PAGE_PARAMS and v.isdigit() for k, v in parse_qsl(parts.query)):
+            pages.append(href)
+    return nxt, pages
+
+
+def extract_html_page(content: bytes, url: str, encoding: str = "utf-8",
+                      xpath: str | None = None) -> tuple[list[dict], str | None, list[str]]:
+    """Jobs plus pagination links from one page; runs in the parse pool, so module-level and pure."""
+    doc = parse_html(content, encoding)
+    return (_jobs_from_doc(doc, url, xpath), *pagination_links(doc, url))
+
+
+def page_values(links: list[str]) -> dict[str, set[int]]:
+    """Values of each paging parameter found in `links`, keyed by its name as written."""
+    values: dict[str, set[int]] = {}
+    for link in links:
+        for k, v in parse_qsl(urlsplit(link).query):
+            if k.lower() in PAGE_PARAMS and v.isdigit():
+                values.setdefault(k, set()).add(int(v))
+    return values
+
+
+def page_param(url: str, links: list[str]) -> tuple[str, int, int] | None:
+    """(parameter, value on `url`, step between pages) of the paging parameter
+    the links use most, e.g. ('startrow', 0, 25); None without one."""
+    values = page_values(links)
+    if not values:
+        return None
+    name = max(values, key=lambda k: len(values[k]))
+    current = next((int(v) for k, v in parse_qsl(urlsplit(url).query) if k == name and v.isdigit()),
+                   PAGE_PARAMS[name.lower()])
+    ahead = sorted(v for v in values[name] if v > current)
+    if not ahead:
+        return None
+    step = min(b - a for a, b in zip([current, *ahead], ahead))
+    return name, current, step
+
+
+def with_param(url: str, name: str, value: int) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != name]
+    return urlunsplit(parts._replace(query=urlencode([*query, (name, str(value))])))
+
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def parse_page(content: bytes, url: str, encoding: str, xpath: str | None):
+    """extract_html_page, in a worker process for large pages so parsing
+    several boards' pages doesn't serialize on the GIL. The time it takes
+    counts towards the board's parse_s."""
+    global _parse_pool, PARSE_PROCESSES
+    t0 = time.perf_counter()
+    try:
+        if PARSE_PROCESSES and len(content) >= PARSE_OFFLOAD_BYTES:
+            with _parse_pool_lock:
+                if _parse_pool is None:
+                    _parse_pool = ProcessPoolExecutor(PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                return _parse_pool.submit(extract_html_page, content, url, encoding, xpath).result()
+            except (BrokenProcessPool, RuntimeError, OSError) as e:    # e.g. no main-module guard in the caller
+                log.warning(f"Parse workers unavailable, parsing in-process from now on: {e}")
+                PARSE_PROCESSES = 0
+        return extract_html_page(content, url, encoding, xpath)
+    finally:
+        metric(parse_s=time.perf_counter() - t0)
+
+
+page_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS * HTML_PAGE_BATCH, thread_name_prefix="page")
+
+
+def fetch_page(url: str, xpath: str | None):
+    """One later page of a listing; None if it couldn't be fetched."""
     try:
-        r = requests.get(url, headers=HEADERS, timeout=20)
-        soup = BeautifulSoup(r.text, "html.parser")
+        r = fetch(url, timeout=20)
+        metric(pages=1)
+        return parse_page(r.content, url, html_encoding(r.content, r.headers.get("Content-Type", "")), xpath)
+    except Exception as e:
+        log.warning(f"HTML page error for {url}: {e}")
+        metric_error(e)
+        return None
+
+
+def scrape_workday_html(url: str) -> list[dict]:
+    """Workday careers page – parse visible job titles via HTML."""
+    jobs = Postings()
+    try:
+        r = fetch(url, conditional=True, timeout=20)
+        t0 = time.perf_counter()
+        doc = parse_html(r.content, html_encoding(r.content, r.headers.get("Content-Type", "")))
         # Workday renders jobs in <li> or <a> tags with data-automation-id
-        for tag in soup.find_all(attrs={"data-automation-id": "jobTitle"}):
-            title = tag.get_text(strip=True)
-            parent = tag.find_parent("a") or tag.find_parent("li")
-            href = ""
-            if parent and parent.name == "a":
-                href = parent.get("href", "")
-            if href and not href.startswith("http"):
-                base = re.match(r'(https?://[^/]+)', url)
-                href = (base.group(1) if base else "") + href
+        for tag in doc.xpath("//*[@data-automation-id='jobTitle']"):
+            title = node_text(tag, sep="")
+            parent = tag if tag.tag == "a" else next(tag.iterancestors("a"), None)
+            href = parent.get("href", "") if parent is not None else ""
             if title:
-                jobs.append({"title": title, "url": href or url, "location": ""})
+                jobs.append({"title": title, "url": absolute(href, url) if href else url, "location": ""})
+        metric(parse_s=time.perf_counter() - t0)
+        jobs.validators = ((url, ValidatorCache.validators(r)),)
+    except NotModified:
+        raise
     except Exception as e:
         log.warning(f"Workday error for {url}: {e}")
+        metric_error(e)
     return jobs
 
 
-def scrape_html(url: str) -> list[dict]:
-    """Generic HTML scraper — finds likely job-title links."""
-    jobs = []
+def scrape_html(url: str, seen=None, selector: str | None = None) -> list[dict]:
+    """Generic HTML scraper — finds likely job-title links, across result pages.
+
+    `selector` (the board's XPath from the registry) targets the job links
+    directly and skips the keyword walk over every anchor when it matches.
+
+    Later pages are found from the first one: when its page links share a
+    paging parameter (page=, startrow=, offset=, …) up to HTML_PAGE_BATCH of
+    the linked pages are fetched at once, and the links on those pages reveal
+    the ones after; otherwise rel=next links are followed one by one.
+    Crawling stops when no further page is linked, at a page with nothing new
+    on it, at a page whose postings are all in `seen`, or at HTML_MAX_PAGES.
+    Only a crawl that read every page returns `validators`.
+    """
+    jobs = Postings()
     try:
-        r = requests.get(url, headers=HEADERS, timeout=20)
-        soup = BeautifulSoup(r.text, "html.parser")
-        # Look for anchors whose text looks like a job title
-        job_keywords = re.compile(
-            r'(analyst|manager|associate|director|officer|specialist|advisor|engineer|'
-            r'developer|coordinator|consultant|accountant|portfolio|research|compliance|'
-            r'operations|quantitative|risk|fixed.income|equity|fund|investment|admin)',
-            re.I
-        )
-        seen = set()
-        for a in soup.find_all("a", href=True):
-            text = a.get_text(" ", strip=True)
-            if len(text) < 5 or len(text) > 120:
-                continue
-            if not job_keywords.search(text):
-                continue
-            href = a["href"]
-            if not href.startswith("http"):
-                base = re.match(r'(https?://[^/]+)', url)
-                href = (base.group(1) if base else "") + href
-            key = text.lower()[:60]
-            if key in seen:
-                continue
-            seen.add(key)
-            jobs.append({"title": text, "url": href, "location": ""})
-        # If nothing found via links, try common job-list containers
-        if not jobs:
-            for tag in soup.select("h3, h4, .job-title, .position-title, [class*='job'], [class*='position']"):
-                text = tag.get_text(" ", strip=True)
-                if job_keywords.search(text) and 5 < len(text) < 120:
-                    jobs.append({"title": text, "url": url, "location": ""})
+        r = fetch(url, conditional=True, timeout=20)
+        metric(pages=1)
+        encoding = html_encoding(r.content, r.headers.get("Content-Type", ""))
+        page_jobs, nxt, links = parse_page(r.content, url, encoding, selector)
+        validators = ((url, ValidatorCache.validators(r)),)
+    except NotModified:
+        raise
     except Exception as e:
         log.warning(f"HTML scrape error for {url}: {e}")
+        metric_error(e)
+        return jobs
+
+    board = board_key(url, "html")
+    collected = set()
+
+    def take(page_jobs: list[dict]) -> bool:
+        """Add a page's postings; False when crawling should stop here."""
+        fresh = [j for j in page_jobs if (j["title"], j["url"]) not in collected]
+        collected.update((j["title"], j["url"]) for j in fresh)
+        jobs.extend(fresh)
+        if fresh and seen is not None and all(is_known(j, board, seen) for j in fresh):
+            jobs.complete = False           # the rest was seen before; pages beyond stay unread
+            return False
+        return bool(fresh)
+
+    def read_rest(page_jobs: list[dict], nxt: str | None, links: list[str]):
+        """Take the first page's postings and those of the pages after it."""
+        hint = links + ([nxt] if nxt else [])
+        paging = page_param(url, hint)
+        if not take(page_jobs):
+            if not paging and not nxt:
+                jobs.complete = True        # a single-page board was read in full
+            return
+        fetched = 1
+        if paging:
+            name, current, step = paging
+            last_linked = max(page_values(hint)[name])
+        while fetched < HTML_MAX_PAGES:
+            if paging:
+                batch = [with_param(url, name, current + step * k)
+                         for k in range(fetched, min(fetched + HTML_PAGE_BATCH, HTML_MAX_PAGES))
+                         if current + step * k <= last_linked]
+                if not batch:
+                    return
+            elif nxt and nxt != url:
+                batch = [nxt]
+            else:
+                return
+            # Each page runs in a copy of this context so its metrics land on this board.
+            futures = [page_pool.submit(contextvars.copy_context().run, fetch_page, page, selector) for page in batch]
+            results = [f.result() for f in futures]
+            fetched += len(batch)
+            for result in results:
+                if result is None:
+                    jobs.complete = False
+                    return
+                page_jobs, nxt, page_links = result
+                if paging:
+                    seen_values = page_values(page_links + ([nxt] if nxt else [])).get(name, ())
+                    last_linked = max([last_linked, *seen_values])
+                if not take(page_jobs):
+                    return
+        log.info(f"  {url}: stopped at the {HTML_MAX_PAGES}-page limit")
+        jobs.complete = False
+
+    read_rest(page_jobs, nxt, links)
+    # Page 1's validators stand for the whole crawl: a 304 next time skips
+    # every page, so they are kept only when all of them were read.
+    if jobs.complete:
+        jobs.validators = validators
     return jobs
 
 
@@ -232,113 +1240,836 @@ SCRAPERS = {
 # SEEN-JOBS TRACKING
 # ──────────────────────────────────────────────────────────────────────────────
 
-SEEN_PATH = Path("data/seen_jobs.json")
+SEEN_BACKEND = os.environ.get("SEEN_BACKEND", "sqlite")   # "sqlite" | "json"
+SEEN_PATH    = Path("data/seen_jobs.json")
+SEEN_DB_PATH = Path("data/seen_jobs.db")
+SEEN_EXPORT_PATH = Path("data/seen_jobs.tsv")    # text copy of the db that is committed to git
 
-def load_seen() -> dict:
-    if SEEN_PATH.exists():
-        with open(SEEN_PATH) as f:
+def load_seen(path: Path = SEEN_PATH) -> dict:
+    if path.exists():
+        with open(path) as f:
             return json.load(f)
     return {}
 
-def save_seen(seen: dict):
-    SEEN_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(SEEN_PATH, "w") as f:
+def save_seen(seen: dict, path: Path = SEEN_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
         json.dump(seen, f, indent=2)
 
 
+SEEN_RETENTION_DAYS = int(os.environ.get("SEEN_RETENTION_DAYS", "90"))   # 0 keeps everything
+
+# Every store tracks, per job id: the day it was first and last seen, the
+# board it came from, and the day it disappeared from that board (if it has).
+# Boards answering 304 (or failing with an empty result) touch all their open
+# jobs; a partial crawl only touches the jobs it returned. Compaction drops
+# jobs once they have been closed for the retention period, but never open
+# jobs of a board still in the registry: a partial crawl leaves those
+# untouched, and forgetting them would re-alert them when a crawl next reads
+# that far.
+
+
+class JsonSeenStore:
+    """The original format: whole history in a dict, file rewritten on commit."""
+
+    defer_export = False
+
+    def __init__(self, path: Path = SEEN_PATH):
+        self.path = path
+        self._seen = load_seen(path)
+        today = str(date.today())
+        for jid, entry in self._seen.items():
+            if isinstance(entry, str):       # legacy {job_id: first_seen}
+                self._seen[jid] = {"first": entry, "last": today, "board": None, "closed": None}
+
+    def __contains__(self, jid: str) -> bool:
+        return jid in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, jid: str, day: str, board: str | None = None):
+        self._seen.setdefault(jid, {"first": day, "last": day, "board": board, "closed": None})
+
+    def alias(self, jid: str, old_jid: str, board: str):
+        """Record `jid` as the same job as `old_jid`, keeping its first-seen day."""
+        if jid not in self._seen and old_jid in self._seen:
+            self._seen[jid] = dict(self._seen[old_jid], board=board)
+
+    def touch(self, jids, day: str, board: str) -> set[str]:
+        """Mark jobs as seen today; returns the ids that had been closed."""
+        reopened = set()
+        for jid in jids:
+            entry = self._seen.get(jid)
+            if entry is None:
+                continue
+            if entry["closed"]:
+                reopened.add(jid)
+            entry.update(last=day, closed=None, board=entry["board"] or board)
+        return reopened
+
+    def touch_board(self, board: str, day: str):
+        for entry in self._seen.values():
+            if entry["board"] == board and not entry["closed"]:
+                entry["last"] = day
+
+    def close_missing(self, board: str, live: set[str], day: str) -> set[str]:
+        """Close the board's open jobs that are no longer listed; returns their ids."""
+        closed = set()
+        for jid, entry in self._seen.items():
+            if entry["board"] == board and not entry["closed"] and jid not in live:
+                entry["closed"] = day
+                closed.add(jid)
+        return closed
+
+    def board_history(self, since: str) -> dict[str, tuple[str, int]]:
+        """Per board: (first day it was crawled, postings first seen after that day and on/after `since`)."""
+        firsts: dict[str, str] = {}
+        for entry in self._seen.values():
+            if entry["board"]:
+                firsts[entry["board"]] = min(firsts.get(entry["board"], entry["first"]), entry["first"])
+        history = {board: (first, 0) for board, first in firsts.items()}
+        for entry in self._seen.values():
+            board = entry["board"]
+            if board and entry["first"] > firsts[board] and entry["first"] >= since:
+                history[board] = (firsts[board], history[board][1] + 1)
+        return history
+
+    def compact(self, max_age_days: int, today: date, boards: set[str]) -> int:
+        """Forget jobs closed for `max_age_days`, and those not seen for that
+        long unless still open on one of `boards`; returns how many were dropped."""
+        cutoff = str(today - timedelta(days=max_age_days))
+        stale = [jid for jid, entry in self._seen.items()
+                 if (entry["closed"] or entry["last"]) < cutoff and (entry["closed"] or entry["board"] not in boards)]
+        for jid in stale:
+            del self._seen[jid]
+        return len(stale)
+
+    def commit(self):
+        save_seen(self._seen, self.path)
+
+    def export_changes(self):
+        pass                                 # the JSON file is its own export
+
+    def close(self):
+        pass
+
+
+class SqliteSeenStore:
+    """Seen jobs in SQLite: indexed lookups, and a run only writes the rows it touches.
+
+    Safe to query from the scraper threads (Workday early-stop checks) while
+    the main thread writes.
+
+    The db file itself stays out of git. Every commit also appends to
+    `export`, a tab-separated text copy without the daily-changing last_seen
+    column: one line per job added, closed or reopened since the last
+    commit, so the later line for a job wins. The file is rewritten in full
+    only once superseded lines outnumber the jobs. A fresh db is rebuilt
+    from that export, or else from the legacy JSON history. With
+    `defer_export` set (watch mode) commits skip the export, and the caller
+    runs export_changes() when it wants the file brought up to date.
+    """
+
+    def __init__(self, path: Path = SEEN_DB_PATH, legacy_json: Path | None = SEEN_PATH,
+                 export: Path | None = SEEN_EXPORT_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fresh = not path.exists()
+        self.path = path
+        self.export = export
+        self.defer_export = False
+        self._changed: set[str] = set()     # ids whose exported line is out of date
+        self._export_lines = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen ("
+                          " job_id     TEXT PRIMARY KEY,"
+                          " first_seen TEXT NOT NULL"
+                          ") WITHOUT ROWID")
+        self._upgrade_schema()
+        if fresh and export and export.exists():
+            self.import_export(export)
+        elif fresh and legacy_json and legacy_json.exists():
+            self.migrate_json(legacy_json)
+        if export and export.exists():
+            with open(export) as f:
+                self._export_lines = sum(1 for _ in f)
+
+    def _upgrade_schema(self):
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(seen)")}
+        if "last_seen" not in columns:
+            # Rows from before last-seen tracking count as seen today, so
+            # they only age out if they stop showing up from here on.
+            self.conn.execute("ALTER TABLE seen ADD COLUMN last_seen TEXT")
+            self.conn.execute("ALTER TABLE seen ADD COLUMN board TEXT")
+            self.conn.execute("ALTER TABLE seen ADD COLUMN closed_on TEXT")
+            self.conn.execute("UPDATE seen SET last_seen = ?", (str(date.today()),))
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_board ON seen (board) WHERE closed_on IS NULL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_last ON seen (last_seen)")
+        self.conn.commit()
+
+    def migrate_json(self, json_path: Path):
+        seen = load_seen(json_path)
+        today = str(date.today())
+        rows = []
+        for jid, entry in seen.items():
+            if isinstance(entry, str):
+                rows.append((jid, entry, today, None, None))
+            else:
+                rows.append((jid, entry["first"], entry["last"], entry.get("board"), entry.get("closed")))
+        with self._lock:
+            self.conn.executemany("INSERT OR IGNORE INTO seen (job_id, first_seen, last_seen, board, closed_on)"
+                                  " VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+        log.info(f"Migrated {len(seen)} seen job(s) from {json_path} to {self.path}")
+
+    EXPORT_HEADER = "job_id\tfirst_seen\tboard\tclosed_on"
+
+    def import_export(self, export: Path):
+        today = str(date.today())
+        rows = []
+        with open(export) as f:
+            for line in f:
+                if line.startswith("job_id\t") or not line.endswith("\n"):
+                    continue                 # header, or a line cut short by a crash mid-append
+                jid, first, board, closed = (line.rstrip("\n").split("\t") + ["", "", ""])[:4]
+                rows.append((jid, first, today, board or None, closed or None))
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO seen (job_id, first_seen, last_seen, board, closed_on)"
+                                  " VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+        log.info(f"Rebuilt {self.path} from {len(rows)} job(s) in {export}")
+
+    EXPORT_COLUMNS = "SELECT job_id, first_seen, COALESCE(board, ''), COALESCE(closed_on, '') FROM seen"
+
+    def write_export(self):
+        """Rewrite the whole export, streamed from the table in first-seen order."""
+        tmp = self.export.with_suffix(".tmp")
+        with self._lock, open(tmp, "w") as f:
+            self._changed.clear()
+            f.write(self.EXPORT_HEADER + "\n")
+            lines = 1
+            for row in self.conn.execute(self.EXPORT_COLUMNS + " ORDER BY first_seen, job_id"):
+                f.write("\t".join(row) + "\n")
+                lines += 1
+        os.replace(tmp, self.export)
+        self._export_lines = lines
+
+    def export_changes(self):
+        """Append the jobs added, closed or reopened since the last export."""
+        if not self.export:
+            return
+        if not self.export.exists() or self._export_lines > 2 * len(self) + 1:
+            self.write_export()
+            return
+        with self._lock:
+            changed, self._changed = list(self._changed), set()
+            rows = []
+            for i in range(0, len(changed), 500):
+                chunk = changed[i:i + 500]
+                rows += self.conn.execute(self.EXPORT_COLUMNS + f" WHERE job_id IN ({','.join('?' * len(chunk))})",
+                                          chunk).fetchall()
+        rows.sort(key=lambda r: (r[1], r[0]))
+        with open(self.export, "a") as f:
+            f.writelines("\t".join(r) + "\n" for r in rows)
+        self._export_lines += len(rows)
+
+    def __contains__(self, jid: str) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM seen WHERE job_id = ?", (jid,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def add(self, jid: str, day: str, board: str | None = None):
+        with self._lock:
+            if self.conn.execute("INSERT OR IGNORE INTO seen (job_id, first_seen, last_seen, board)"
+                                 " VALUES (?, ?, ?, ?)", (jid, day, day, board)).rowcount:
+                self._changed.add(jid)
+
+    def alias(self, jid: str, old_jid: str, board: str):
+        """Record `jid` as the same job as `old_jid`, keeping its first-seen day."""
+        with self._lock:
+            if self.conn.execute("INSERT OR IGNORE INTO seen (job_id, first_seen, last_seen, board, closed_on)"
+                                 " SELECT ?, first_seen, last_seen, ?, closed_on FROM seen WHERE job_id = ?",
+                                 (jid, board, old_jid)).rowcount:
+                self._changed.add(jid)
+
+    def touch(self, jids, day: str, board: str) -> set[str]:
+        """Mark jobs as seen today; returns the ids that had been closed."""
+        jids = list(jids)
+        with self._lock:
+            reopened = set()
+            for i in range(0, len(jids), 500):
+                chunk = jids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                reopened.update(r[0] for r in self.conn.execute(
+                    f"SELECT job_id FROM seen WHERE closed_on IS NOT NULL AND job_id IN ({marks})", chunk))
+            self.conn.executemany("UPDATE seen SET last_seen = ?, closed_on = NULL, board = COALESCE(board, ?)"
+                                  " WHERE job_id = ?", [(day, board, jid) for jid in jids])
+            self._changed.update(reopened)
+        return reopened
+
+    def touch_board(self, board: str, day: str):
+        with self._lock:
+            self.conn.execute("UPDATE seen SET last_seen = ? WHERE board = ? AND closed_on IS NULL", (day, board))
+
+    def close_missing(self, board: str, live: set[str], day: str) -> set[str]:
+        """Close the board's open jobs that are no longer listed; returns their ids."""
+        with self._lock:
+            open_ids = {r[0] for r in self.conn.execute(
+                "SELECT job_id FROM seen WHERE board = ? AND closed_on IS NULL", (board,))}
+            closed = open_ids - live
+            self.conn.executemany("UPDATE seen SET closed_on = ? WHERE job_id = ?", [(day, jid) for jid in closed])
+            self._changed.update(closed)
+        return closed
+
+    def board_history(self, since: str) -> dict[str, tuple[str, int]]:
+        """Per board: (first day it was crawled, postings first seen after that day and on/after `since`)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT s.board, f.first, SUM(s.first_seen > f.first AND s.first_seen >= ?)"
+                " FROM seen s JOIN (SELECT board, MIN(first_seen) AS first FROM seen"
+                "                   WHERE board IS NOT NULL GROUP BY board) f USING (board)"
+                " GROUP BY s.board", (since,)).fetchall()
+        return {board: (first, count) for board, first, count in rows}
+
+    def compact(self, max_age_days: int, today: date, boards: set[str]) -> int:
+        """Forget jobs closed for `max_age_days`, and those not seen for that
+        long unless still open on one of `boards`; returns how many were dropped."""
+        cutoff = str(today - timedelta(days=max_age_days))
+        with self._lock:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS live_board (board TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM live_board")
+            self.conn.executemany("INSERT OR IGNORE INTO live_board VALUES (?)", [(b,) for b in boards])
+            return self.conn.execute(
+                "DELETE FROM seen WHERE closed_on < ? OR (closed_on IS NULL AND last_seen < ?"
+                " AND (board IS NULL OR board NOT IN (SELECT board FROM live_board)))", (cutoff, cutoff)).rowcount
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+        if not self.defer_export:
+            self.export_changes()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def open_seen_store(backend: str = SEEN_BACKEND):
+    if backend == "json":
+        return JsonSeenStore(SEEN_PATH)
+    if backend == "sqlite":
+        return SqliteSeenStore(SEEN_DB_PATH, legacy_json=SEEN_PATH, export=SEEN_EXPORT_PATH)
+    raise ValueError(f"Unknown SEEN_BACKEND {backend!r} (expected 'sqlite' or 'json')")
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # MAIN SCRAPE LOOP
 # ──────────────────────────────────────────────────────────────────────────────
 
-def collect_new_jobs() -> tuple[list[dict], dict]:
-    seen = load_seen()
+def board_key(url: str, ats: str) -> str:
+    """Identity of the board behind a careers URL, used to fetch it once per run."""
+    if ats == "greenhouse":
+        m = re.search(r'greenhouse\.io/([^/?#\s]+)', url)
+        if m:
+            return f"greenhouse:{m.group(1).lower()}"
+    elif ats == "lever":
+        m = re.search(r'lever\.co/([^/?#\s]+)', url)
+        if m:
+            return f"lever:{m.group(1).lower()}"
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+    if ats == "workday" and path.endswith("/jobs"):
+        path = path[:-len("/jobs")]
+    # The fragment never reaches the server, so it can't change the page.
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{ats}:" + urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def plan_fetches(boards: list[Board]) -> dict[str, list[Board]]:
+    """Group registry rows by board, in first-seen order."""
+    plan: dict[str, list[Board]] = {}
+    for b in boards:
+        plan.setdefault(board_key(b.url, b.ats), []).append(b)
+    return plan
+
+
+def jobs_for_row(jobs: list[dict], row: Board, board_cities: set[str]) -> list[dict]:
+    """Slice a board's postings for one registry row.
+
+    A row's `location` regex drops postings whose (non-empty) location
+    doesn't match. Boards referenced from several cities are also split: a
+    posting goes to the rows whose city appears in its location. Postings
+    located somewhere else are dropped rather than filed under the wrong
+    city; only those without any location are left for every row (the first
+    one claims them).
+    """
+    if row.location:
+        loc_re = re.compile(row.location, re.I)
+        jobs = [j for j in jobs if not j.get("location") or loc_re.search(j["location"])]
+    if len(board_cities) < 2:
+        return jobs
+    kept = []
+    for j in jobs:
+        loc = j.get("location", "").lower()
+        matches = {c for c in board_cities if c.lower() in loc}
+        if row.city in matches or (not loc and not matches):
+            kept.append(j)
+    return kept
+
+
+class CrawlSchedule:
+    """When each board was last crawled successfully, persisted between runs."""
+
+    SLACK = 0.9     # a daily board is due again after ~21.6h, so cron jitter can't skip a day
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._last: dict[str, str] = {}
+        self._retry_at: dict[str, datetime] = {}    # failed crawls; in memory, only matters in --watch
+        if path.exists():
+            with open(path) as f:
+                self._last = json.load(f)
+
+    def due_in(self, key: str, every_hours: float, now: datetime) -> float:
+        """Seconds until the board is due (<= 0: due now)."""
+        retry = self._retry_at.get(key)
+        if retry:
+            return (retry - now).total_seconds()
+        last = self._last.get(key)
+        if not last:
+            return 0.0
+        due = datetime.fromisoformat(last) + timedelta(hours=every_hours * self.SLACK)
+        return (due - now).total_seconds()
+
+    def is_due(self, key: str, every_hours: float, now: datetime) -> bool:
+        return self.due_in(key, every_hours, now) <= 0
+
+    def failed(self, key: str, when: datetime, retry_hours: float):
+        """Hold a failed board back for `retry_hours` instead of retrying it on every pass."""
+        self._retry_at[key] = when + timedelta(hours=retry_hours)
+
+    def last_crawled(self, key: str) -> datetime | None:
+        last = self._last.get(key)
+        return datetime.fromisoformat(last) if last else None
+
+    def mark(self, key: str, when: datetime):
+        self._last[key] = when.isoformat(timespec="seconds")
+        self._retry_at.pop(key, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self._last, f, indent=2, sort_keys=True)
+
+
+CRAWL_STATE_PATH = Path("data/crawl_state.json")
+schedule = CrawlSchedule(CRAWL_STATE_PATH)
+FAILED_RETRY_HOURS = float(os.environ.get("FAILED_RETRY_HOURS", "1"))
+
+# Adaptive scheduling: with a CRAWL_BUDGET, only that many of the due boards
+# are crawled per run — the ones expected to have the most new postings
+# (observed churn × time since last crawl) — except that a board not crawled
+# for MAX_STALENESS_DAYS is always included.
+CRAWL_BUDGET       = int(os.environ.get("CRAWL_BUDGET", "0"))          # boards per run; 0 = all due boards
+MAX_STALENESS_DAYS = float(os.environ.get("MAX_STALENESS_DAYS", "7"))
+CHURN_WINDOW_DAYS  = int(os.environ.get("CHURN_WINDOW_DAYS", "60"))
+
+
+def churn_rates(history: dict[str, tuple[str, int]], today: date, window_days: int = CHURN_WINDOW_DAYS) -> dict[str, float]:
+    """New postings per day for each board, from the seen store's history.
+
+    The first crawl of a board reports its whole backlog as new, so that day
+    is left out. A small prior keeps quiet or young boards above zero.
+    """
+    rates = {}
+    for board, (first, count) in history.items():
+        observed = min(window_days, (today - date.fromisoformat(first)).days)
+        rates[board] = (count + 0.5) / (max(observed, 0) + 1)
+    return rates
+
+
+def prioritize(due: dict[str, list[Board]], rates: dict[str, float], now: datetime,
+               budget: int, max_staleness_days: float) -> dict[str, list[Board]]:
+    """Pick at most `budget` boards out of `due`, plus every overdue one."""
+    def staleness_days(key):
+        last = schedule.last_crawled(key)
+        return float("inf") if last is None else (now - last).total_seconds() / 86400
+
+    forced = [key for key in due if staleness_days(key) >= max_staleness_days]
+    if len(forced) > budget:
+        log.warning(f"Scheduler: {len(forced)} board(s) past {max_staleness_days:g} days of staleness exceed "
+                    f"the budget of {budget}; crawling all of them")
+    default_rate = min(rates.values(), default=0.5)
+    expected = {key: rates.get(key, default_rate) * staleness_days(key) for key in due if key not in forced}
+    ranked = sorted(expected, key=expected.get, reverse=True)
+    chosen = set(forced) | set(ranked[:max(0, budget - len(forced))])
+    log.info(f"Scheduler: {len(chosen)} of {len(due)} due board(s) picked "
+             f"({len(forced)} forced by staleness, budget {budget})")
+    return {key: rows for key, rows in due.items() if key in chosen}
+
+
+def scrape_board(rows: list[Board], seen, metrics: BoardMetrics) -> list[dict] | None:
+    """Scrape one board; None means it answered 304 and can be skipped."""
+    board = rows[0]
+    also = f" (+{len(rows) - 1} more row(s))" if len(rows) > 1 else ""
+    log.info(f"Scraping {board.name} ({board.ats}){also} …")
+    options = {"selector": board.selector} if board.selector else {}
+    if board.ats == "workday" and all(r.location for r in rows):
+        options["location"] = "|".join(f"(?:{r.location})" for r in rows)
+    key = board_key(board.url, board.ats)
+    until = breaker.open_until(key)
+    if until:
+        log.info(f"  {board.name}: skipped until {until} after repeated failures")
+        metrics.finish("circuit_open", 0.0, 0)
+        return []
+    token = _board_metrics.set(metrics)
+    t0 = time.perf_counter()
+    jobs, status = [], "ok"
+    try:
+        jobs = SCRAPERS[board.ats](board.url, seen, **options)
+    except NotModified:
+        log.info(f"  {board.name}: not modified")
+        jobs, status = None, "not_modified"
+    except Exception as e:
+        log.error(f"  Error for {board.name}: {e}")
+        metric_error(e)
+    finally:
+        _board_metrics.reset(token)
+    if status == "ok" and metrics.record["errors"]:
+        status = "error"
+    if status == "error" and not jobs:
+        breaker.failure(key)
+    else:
+        breaker.success(key)
+    metrics.finish(status, time.perf_counter() - t0, len(jobs or []))
+    return jobs
+
+
+def interleave_by_host(boards: dict[str, list[Board]]) -> list[str]:
+    queues: dict[str, list[str]] = {}
+    for key, rows in boards.items():
+        queues.setdefault(host_key(rows[0].url), []).append(key)
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].pop(0))
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+def collect_new_jobs(seen=None, boards: list[Board] | None = None, force: bool = False,
+                     on_new=None, crawl_budget: int | None = None, on_metrics=None) -> tuple[list[dict], object]:
+    """Crawl the boards that are due (all of them with `force`) and diff against `seen`.
+
+    `on_new(new_jobs)` runs before the seen store is committed, so a caller
+    can checkpoint the postings first: after a crash they are either still
+    uncommitted (and found again) or already in the checkpoint.
+
+    At most `crawl_budget` (default CRAWL_BUDGET) due boards are crawled,
+    0 meaning all. The per-board
+    metrics go to a new file under METRICS_DIR, or to `on_metrics(records)`
+    when given.
+    """
+    seen = seen if seen is not None else open_seen_store()
+    boards = boards if boards is not None else registry.boards
+    crawl_budget = crawl_budget if crawl_budget is not None else CRAWL_BUDGET
     new_jobs = []
+    started = datetime.now()
+    for b in boards:
+        if b.delay is not None:
+            limiter.set_delay(b.url, b.delay)
+    full_plan = plan_fetches(boards)
+    plan = {key: rows for key, rows in full_plan.items()
+            if force or schedule.is_due(key, min(r.every_hours for r in rows), started)}
+    log.info(f"{len(boards)} rows → {len(full_plan)} distinct boards, {len(plan)} due for a crawl")
+    if crawl_budget and not force:
+        since = str(date.today() - timedelta(days=CHURN_WINDOW_DAYS))
+        rates = churn_rates(seen.board_history(since), date.today())
+        plan = prioritize(plan, rates, started, crawl_budget, MAX_STALENESS_DAYS)
+    unchanged = skipped = 0
+    today = str(date.today())
+    closed_total = 0
+    budget.start(RUN_TIME_BUDGET)
+    metrics = {key: BoardMetrics(key, rows[0].name, rows[0].ats) for key, rows in plan.items()}
 
-    for company, city, url, ats in COMPANIES:
-        log.info(f"Scraping {company} ({ats}) …")
-        try:
-            raw_jobs = SCRAPERS[ats](url)
-        except Exception as e:
-            log.error(f"  Error: {e}")
-            raw_jobs = []
-
-        for j in raw_jobs:
-            jid = job_id(j["title"], j["url"])
-            if jid not in seen:
-                seen[jid] = str(date.today())
-                new_jobs.append({
-                    "company":  company,
-                    "city":     city,
-                    "title":    j["title"],
-                    "url":      j["url"],
-                    "location": j.get("location", ""),
-                    "found":    str(date.today()),
-                })
+    # Submit round-robin across hosts so workers aren't all parked behind one
+    # host's delay, then diff in registry order to keep the digest stable.
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        futures = {key: pool.submit(scrape_board, plan[key], seen, metrics[key]) for key in interleave_by_host(plan)}
+        for key, rows in plan.items():
+            try:
+                board_jobs = futures[key].result(timeout=budget.wait_time(grace=5))
+            except FutureTimeout:
+                # Out of time: leave the board's history as it was and move on.
+                log.warning(f"  {rows[0].name}: skipped, run time budget exhausted")
+                metrics[key].record["status"] = "skipped"
+                skipped += 1
+                seen.touch_board(key, today)
+                continue
+            if metrics[key].record["status"] in ("ok", "not_modified"):
+                schedule.mark(key, started)
+            else:
+                schedule.failed(key, started, FAILED_RETRY_HOURS)
+            if board_jobs is None:
+                unchanged += 1
+                seen.touch_board(key, today)
+                continue
+            board_cities = {row.city for row in rows}
+            for row in rows:
+                for j in jobs_for_row(board_jobs, row, board_cities):
+                    jid, legacy = job_keys(j, key)
+                    if jid in seen:
+                        continue
+                    if legacy != jid and legacy in seen:
+                        seen.alias(jid, legacy, key)     # known under its pre-canonical id
+                        continue
+                    seen.add(jid, today, key)
+                    metrics[key].record["new"] += 1
+                    new_jobs.append({
+                        "id":       jid,
+                        "company":  row.name,
+                        "city":     row.city,
+                        "title":    j["title"],
+                        "url":      j["url"],
+                        "location": j.get("location", ""),
+                        "posted":   j.get("posted", ""),
+                        "found":    today,
+                        "board_url": row.url,
+                    })
 
-        time.sleep(0.8)   # polite delay between requests
+            live = {job_keys(j, key)[0]: j for j in board_jobs}
+            for jid in seen.touch(live, today, key):
+                log.info(f"  ↺ Reappeared at {rows[0].name}: {live[jid]['title']}")
+            # An empty result is far more often a failed scrape than a board
+            # with no openings, so only a full, non-empty crawl closes jobs.
+            # A partial crawl (early stop) has touched what it returned above;
+            # refreshing the whole board would keep its unread jobs forever.
+            if board_jobs and getattr(board_jobs, "complete", True):
+                closed = seen.close_missing(key, set(live), today)
+                if closed:
+                    log.info(f"  ✖ {len(closed)} posting(s) closed at {rows[0].name}")
+                    metrics[key].record["closed"] = len(closed)
+                    closed_total += len(closed)
+            elif not board_jobs:
+                seen.touch_board(key, today)
+            # Only now that the postings are diffed may the next fetch be conditional.
+            for cached_url, validators in getattr(board_jobs, "validators", ()):
+                http_cache.remember(cached_url, validators)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    save_seen(seen)
+    new_jobs = drop_near_duplicates(new_jobs)
+    log.info(f"{unchanged} of {len(plan)} board(s) unchanged since last run; {closed_total} posting(s) closed")
+    if skipped:
+        log.warning(f"{skipped} board(s) skipped by the {RUN_TIME_BUDGET:.0f}s run time budget")
+    if SEEN_RETENTION_DAYS:
+        evicted = seen.compact(SEEN_RETENTION_DAYS, date.today(), set(full_plan))
+        if evicted:
+            log.info(f"Compacted seen store: dropped {evicted} job(s) closed or unlisted for {SEEN_RETENTION_DAYS}+ days")
+    if on_new is not None:
+        on_new(new_jobs)
+    seen.commit()
+    http_cache.save()
+    breaker.save()
+    schedule.save()
+
+    records = [m.record for m in metrics.values()]
+    if on_metrics is not None:
+        on_metrics(records)
+    else:
+        log_slowest(records)
+        log.info(f"Metrics written to {write_metrics(records, started)}")
     return new_jobs, seen
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# EMAIL BUILDER
+# SUBSCRIBERS
+# Profiles live in data/subscribers.json (or the SUBSCRIBERS_JSON secret), one
+# object per recipient; every filter is optional and an empty one matches all:
+#   email       required
+#   keywords    a title must contain at least one ("portfolio", "fund accounting")
+#   exclude     a title must contain none of these
+#   cities, companies, seniority  (seniority: intern | junior | mid | senior | executive)
+# Without a profile file the digest goes to RECIPIENT_EMAIL, unfiltered.
 # ──────────────────────────────────────────────────────────────────────────────
 
-def build_email(new_jobs: list[dict]) -> tuple[str, str]:
-    today = datetime.now().strftime("%A, %B %d %Y")
-    count = len(new_jobs)
+SUBSCRIBERS_PATH = Path(os.environ.get("SUBSCRIBERS_FILE", "data/subscribers.json"))
 
-    # Group by city → company
-    by_city: dict[str, dict[str, list]] = {"Toronto": {}, "Halifax": {}}
-    for j in new_jobs:
-        city = j["city"]
-        comp = j["company"]
-        by_city.setdefault(city, {}).setdefault(comp, []).append(j)
+# Title words that place a posting at a level; checked top to bottom, and a
+# title with none of them is "mid".
+SENIORITY_TERMS = {
+    "executive": ["chief", "head of", "vice president", "vp", "svp", "evp", "managing director", "director", "partner"],
+    "senior":    ["senior", "sr", "lead", "principal", "staff", "manager"],
+    "intern":    ["intern", "internship", "co-op", "coop", "student", "summer"],
+    "junior":    ["junior", "jr", "entry level", "graduate", "new grad", "trainee"],
+}
+SENIORITY_LEVELS = (*SENIORITY_TERMS, "mid")
 
-    # ── HTML ──────────────────────────────────────────────────────────────────
-    city_blocks = ""
-    for city, companies in by_city.items():
-        if not companies:
-            continue
-        job_rows = ""
-        for company, jobs in sorted(companies.items()):
-            for j in jobs:
-                loc_badge = (f'<span style="background:#e8f0fe;color:#1a73e8;'
-                             f'padding:2px 8px;border-radius:12px;font-size:11px;'
-                             f'margin-left:8px;">{j["location"]}</span>'
-                             if j["location"] else "")
-                job_rows += f"""
-                <tr>
-                  <td style="padding:10px 16px;border-bottom:1px solid #f0f4f8;">
-                    <div style="font-size:13px;color:#888;margin-bottom:2px;">🏢 {company}</div>
-                    <div>
-                      <a href="{j['url']}" style="color:#1a73e8;font-weight:600;font-size:14px;
-                                                   text-decoration:none;">{j['title']}</a>
-                      {loc_badge}
-                    </div>
-                  </td>
-                </tr>"""
 
-        city_color = "#1F3864" if city == "Toronto" else "#2E75B6"
-        city_blocks += f"""
-        <div style="margin-bottom:28px;">
-          <div style="background:{city_color};color:#fff;padding:10px 18px;
-                      border-radius:8px 8px 0 0;font-size:15px;font-weight:700;
-                      letter-spacing:0.5px;">📍 {city}</div>
-          <table width="100%" cellpadding="0" cellspacing="0"
-                 style="border:1px solid #dde3ec;border-top:none;
-                        border-radius:0 0 8px 8px;background:#fff;">
-            {job_rows}
-          </table>
-        </div>"""
+@dataclass(frozen=True, slots=True)
+class Subscriber:
+    email: str
+    keywords: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    cities: tuple[str, ...] = ()
+    companies: tuple[str, ...] = ()
+    seniority: tuple[str, ...] = ()
 
-    if not city_blocks:
-        city_blocks = """<p style="color:#666;text-align:center;padding:32px;">
-          No new job postings detected since yesterday. Check back tomorrow!
-        </p>"""
 
-    html = f"""<!DOCTYPE html>
+def _terms(entry: dict, field: str) -> tuple[str, ...]:
+    value = entry.get(field) or []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{field!r} must be a list of strings")
+    return tuple(dict.fromkeys(" ".join(v.lower().split()) for v in value if v.strip()))
+
+
+def parse_subscriber(entry: dict) -> Subscriber:
+    unknown = set(entry) - {"email", "keywords", "exclude", "cities", "companies", "seniority"}
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(sorted(unknown))}")
+    email = str(entry.get("email", "")).strip()
+    if not re.fullmatch(r'[^@\s]+@[^@\s]+\.[^@\s]+', email):
+        raise ValueError(f"bad email {email!r}")
+    for field in ("keywords", "exclude"):
+        empty = [t for t in _terms(entry, field) if not phrase(t)]
+        if empty:
+            raise ValueError(f"{field} {empty!r} contain no letters or digits")
+    seniority = _terms(entry, "seniority")
+    bad = set(seniority) - set(SENIORITY_LEVELS)
+    if bad:
+        raise ValueError(f"unknown seniority {', '.join(sorted(bad))} (expected {', '.join(SENIORITY_LEVELS)})")
+    return Subscriber(email=email, keywords=_terms(entry, "keywords"), exclude=_terms(entry, "exclude"),
+                      cities=_terms(entry, "cities"), companies=_terms(entry, "companies"), seniority=seniority)
+
+
+def load_subscribers(path: Path = SUBSCRIBERS_PATH) -> list[Subscriber]:
+    """Profiles from SUBSCRIBERS_JSON, else `path`, else one unfiltered
+    profile per address in RECIPIENT_EMAIL (comma-separated)."""
+    raw = os.environ.get("SUBSCRIBERS_JSON", "").strip()
+    if raw:
+        source, entries = "SUBSCRIBERS_JSON", json.loads(raw)
+    elif path.exists():
+        source, entries = str(path), json.loads(path.read_text())
+    else:
+        return [Subscriber(email=e.strip()) for e in os.environ["RECIPIENT_EMAIL"].split(",") if e.strip()]
+    if not isinstance(entries, list):
+        raise ValueError(f"{source}: expected a list of subscribers")
+
+    subscribers, errors = [], []
+    for i, entry in enumerate(entries, 1):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("expected an object")
+            subscribers.append(parse_subscriber(entry))
+        except Exception as e:
+            errors.append(f"  entry {i}: {e}")
+    if errors:
+        raise ValueError(f"{source}: {len(errors)} invalid subscriber(s):\n" + "\n".join(errors))
+    return subscribers
+
+
+TITLE_TOKEN = re.compile(r'[a-z0-9]+[+#]*')     # "Sr. C++ Developer (Co-op)" → sr, c++, developer, co, op
+
+
+def phrase(text: str) -> tuple[str, ...]:
+    return tuple(TITLE_TOKEN.findall(text.lower()))
+
+
+class SubscriptionMatcher:
+    """Routes postings to subscribers with one lookup pass per title.
+
+    Every keyword, exclude term and seniority word of every profile is
+    tokenized into one phrase table. A title's hits are all of its word
+    n-grams found in that table, so overlapping and nested terms ("manager"
+    inside "portfolio manager") all count. Each subscriber is one bit, and
+    per filter value there is a mask of the subscribers it admits, so a
+    posting's recipients are the AND of a handful of masks — no loop over
+    subscribers per posting.
+    """
+
+    def __init__(self, subscribers: list[Subscriber]):
+        self.subscribers = subscribers
+        everyone = (1 << len(subscribers)) - 1
+        self._keyword: dict[tuple, int] = {}
+        self._exclude: dict[tuple, int] = {}
+        self._city: dict[str, int] = {}
+        self._company: dict[str, int] = {}
+        self._level: dict[str, int] = {}
+        self._any = {"keyword": 0, "city": 0, "company": 0, "level": 0}
+        for bit, sub in enumerate(subscribers):
+            for values, masks, dim in ((tuple(filter(None, map(phrase, sub.keywords))), self._keyword, "keyword"),
+                                       (sub.cities, self._city, "city"), (sub.companies, self._company, "company"),
+                                       (sub.seniority, self._level, "level")):
+                if not values:
+                    self._any[dim] |= 1 << bit
+                for v in values:
+                    masks[v] = masks.get(v, 0) | 1 << bit
+            for v in filter(None, map(phrase, sub.exclude)):
+                self._exclude[v] = self._exclude.get(v, 0) | 1 << bit
+        self._everyone = everyone
+
+        self._level_of = {phrase(t): level for level, terms in SENIORITY_TERMS.items() for t in terms}
+        self._phrases = set(self._keyword) | set(self._exclude) | set(self._level_of)
+        self._longest = max(map(len, self._phrases), default=0)
+
+    def hits(self, title: str) -> set[tuple]:
+        """Every known phrase occurring in `title`, overlapping ones included."""
+        tokens = phrase(title)
+        return {gram for n in range(1, self._longest + 1) for i in range(len(tokens) - n + 1)
+                if (gram := tuple(tokens[i:i + n])) in self._phrases}
+
+    def seniority(self, hits: set[tuple]) -> str:
+        for level in SENIORITY_TERMS:
+            if any(self._level_of.get(h) == level for h in hits):
+                return level
+        return "mid"
+
+    def recipients(self, job: dict) -> int:
+        """Bit mask of the subscribers `job` should go to."""
+        hits = self.hits(job["title"])
+        mask = self._any["keyword"]
+        for h in hits:
+            mask |= self._keyword.get(h, 0)
+        mask &= self._any["city"] | self._city.get(job["city"].lower(), 0)
+        mask &= self._any["company"] | self._company.get(job["company"].lower(), 0)
+        mask &= self._any["level"] | self._level.get(self.seniority(hits), 0)
+        for h in hits:
+            mask &= ~self._exclude.get(h, 0)
+        return mask & self._everyone
+
+    def route(self, new_jobs: list[dict]) -> list[tuple[Subscriber, list[dict]]]:
+        """Each subscriber's postings, in the original order."""
+        per_bit: dict[int, list[dict]] = {bit: [] for bit in range(len(self.subscribers))}
+        for j in new_jobs:
+            mask = self.recipients(j)
+            while mask:
+                low = mask & -mask
+                per_bit[low.bit_length() - 1].append(j)
+                mask ^= low
+        return [(self.subscribers[bit], jobs) for bit, jobs in per_bit.items()]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# EMAIL BUILDER
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Digests are rendered from these templates into a list buffer; every value
+# substituted into the HTML goes through html.escape first.
+DIGEST_MAX_JOBS        = int(os.environ.get("DIGEST_MAX_JOBS", "300"))        # postings listed in one email
+DIGEST_MAX_PER_COMPANY = int(os.environ.get("DIGEST_MAX_PER_COMPANY", "15"))  # then "+N more at …"
+
+CITY_COLORS = {"Toronto": "#1F3864"}                   # any other city: #2E75B6
+
+_HTML_HEAD = Template("""<!DOCTYPE html>
 <html>
 <head><meta charset="UTF-8"></head>
 <body style="margin:0;padding:0;background:#f4f7fb;font-family:Arial,sans-serif;">
@@ -354,7 +2085,7 @@ def build_email(new_jobs: list[dict]) -> tuple[str, str]:
                      padding:28px 32px;text-align:center;">
             <div style="font-size:22px;font-weight:700;color:#fff;
                         letter-spacing:0.5px;">📊 Daily Job Alert</div>
-            <div style="color:#cfe2ff;font-size:13px;margin-top:6px;">{today}</div>
+            <div style="color:#cfe2ff;font-size:13px;margin-top:6px;">$today</div>
           </td>
         </tr>
 
@@ -362,15 +2093,55 @@ def build_email(new_jobs: list[dict]) -> tuple[str, str]:
         <tr>
           <td style="background:#e8f0fe;padding:14px 32px;text-align:center;
                      color:#1a73e8;font-weight:600;font-size:14px;">
-            {'🎉 ' + str(count) + ' new job posting' + ('s' if count != 1 else '') + ' found across Toronto & Halifax companies'
-             if count else '😴 No new postings today — all quiet on the hiring front'}
+            $summary
           </td>
         </tr>
 
         <!-- Job listings -->
         <tr>
           <td style="padding:28px 32px;">
-            {city_blocks}
+""")
+
+_HTML_CITY_OPEN = Template("""
+        <div style="margin-bottom:28px;">
+          <div style="background:$color;color:#fff;padding:10px 18px;
+                      border-radius:8px 8px 0 0;font-size:15px;font-weight:700;
+                      letter-spacing:0.5px;">📍 $city</div>
+          <table width="100%" cellpadding="0" cellspacing="0"
+                 style="border:1px solid #dde3ec;border-top:none;
+                        border-radius:0 0 8px 8px;background:#fff;">""")
+
+_HTML_CITY_CLOSE = """
+          </table>
+        </div>"""
+
+_HTML_ROW = Template("""
+                <tr>
+                  <td style="padding:10px 16px;border-bottom:1px solid #f0f4f8;">
+                    <div style="font-size:13px;color:#888;margin-bottom:2px;">🏢 $company</div>
+                    <div>
+                      <a href="$url" style="color:#1a73e8;font-weight:600;font-size:14px;
+                                                   text-decoration:none;">$title</a>
+                      $badges
+                    </div>
+                  </td>
+                </tr>""")
+
+_HTML_BADGE = Template('<span style="background:$bg;color:$fg;padding:2px 8px;border-radius:12px;'
+                       'font-size:11px;margin-left:8px;">$text</span>')
+
+_HTML_MORE = Template("""
+                <tr>
+                  <td style="padding:10px 16px;border-bottom:1px solid #f0f4f8;font-size:13px;color:#888;">
+                    🏢 $company — <a href="$url" style="color:#1a73e8;">+$more more posting$s</a>
+                  </td>
+                </tr>""")
+
+_HTML_EMPTY = """<p style="color:#666;text-align:center;padding:32px;">
+          No new job postings detected since yesterday. Check back tomorrow!
+        </p>"""
+
+_HTML_FOOT = Template("""
           </td>
         </tr>
 
@@ -380,7 +2151,7 @@ def build_email(new_jobs: list[dict]) -> tuple[str, str]:
                      border-top:1px solid #e8edf3;">
             <div style="font-size:11px;color:#999;">
               This digest is generated automatically each morning by your Job Alert Agent.<br>
-              Monitoring <strong>{len(COMPANIES)} career pages</strong> across Toronto & Halifax
+              Monitoring <strong>$boards career pages</strong> across Toronto & Halifax
               asset management and fund administration companies.
             </div>
           </td>
@@ -390,30 +2161,102 @@ def build_email(new_jobs: list[dict]) -> tuple[str, str]:
     </td></tr>
   </table>
 </body>
-</html>"""
+</html>""")
+
+_PLAIN_ROW  = Template("  [$company] $title$extra\n  $url\n\n")
+_PLAIN_MORE = Template("  [$company] +$more more: $url\n\n")
+
+
+def digest_sections(new_jobs: list[dict], max_jobs: int = DIGEST_MAX_JOBS,
+                    per_company: int = DIGEST_MAX_PER_COMPANY):
+    """Group postings by city → company and apply the digest caps.
+
+    Yields (city, company, listed, more, board_url): each company lists at
+    most `per_company` postings and the whole digest at most `max_jobs`;
+    whatever doesn't fit collapses into a "+more" line for that company.
+    """
+    by_city: dict[str, dict[str, list]] = {"Toronto": {}, "Halifax": {}}
+    for j in new_jobs:
+        by_city.setdefault(j["city"], {}).setdefault(j["company"], []).append(j)
 
-    # ── Plain text fallback ───────────────────────────────────────────────────
-    plain = f"Daily Job Alert — {today}\n{'='*50}\n"
-    plain += f"{count} new posting(s) found.\n\n"
+    room = max_jobs
     for city, companies in by_city.items():
-        if companies:
-            plain += f"\n── {city} ──\n"
-            for comp, jobs in sorted(companies.items()):
-                for j in jobs:
-                    plain += f"  [{comp}] {j['title']}\n  {j['url']}\n\n"
+        for company, jobs in sorted(companies.items()):
+            listed = jobs[:max(0, min(per_company, room))]
+            room -= len(listed)
+            yield city, company, listed, len(jobs) - len(listed), jobs[0].get("board_url", jobs[0]["url"])
+
+
+def _badges(j: dict) -> str:
+    badges = []
+    if j.get("location"):
+        badges.append(_HTML_BADGE.substitute(bg="#e8f0fe", fg="#1a73e8", text=escape(j["location"])))
+    if j.get("also_in"):
+        badges.append(_HTML_BADGE.substitute(bg="#eef7ee", fg="#188038",
+                                             text="also " + escape(", ".join(j["also_in"]))))
+    if j.get("posted") and j["posted"] != j.get("found"):
+        badges.append(_HTML_BADGE.substitute(bg="#f1f3f4", fg="#5f6368", text="posted " + escape(j["posted"])))
+    return "".join(badges)
+
+
+def build_email(new_jobs: list[dict]) -> tuple[str, str]:
+    today = datetime.now().strftime("%A, %B %d %Y")
+    count = len(new_jobs)
+    summary = ("🎉 " + str(count) + " new job posting" + ("s" if count != 1 else "") +
+               " found across Toronto & Halifax companies"
+               if count else "😴 No new postings today — all quiet on the hiring front")
 
-    return html, plain
+    html = [_HTML_HEAD.substitute(today=today, summary=summary)]
+    plain = [f"Daily Job Alert — {today}\n{'='*50}\n", f"{count} new posting(s) found.\n\n"]
+    city = None
+    for section_city, company, listed, more, board_url in digest_sections(new_jobs):
+        if section_city != city:
+            if city is not None:
+                html.append(_HTML_CITY_CLOSE)
+            city = section_city
+            html.append(_HTML_CITY_OPEN.substitute(color=CITY_COLORS.get(city, "#2E75B6"), city=escape(city)))
+            plain.append(f"\n── {city} ──\n")
+        company_h = escape(company)
+        for j in listed:
+            html.append(_HTML_ROW.substitute(company=company_h, url=escape(j["url"]),
+                                             title=escape(j["title"]), badges=_badges(j)))
+            extra = f" (also {', '.join(j['also_in'])})" if j.get("also_in") else ""
+            plain.append(_PLAIN_ROW.substitute(company=company, title=j["title"], extra=extra, url=j["url"]))
+        if more:
+            html.append(_HTML_MORE.substitute(company=company_h, url=escape(board_url),
+                                              more=more, s="s" if more != 1 else ""))
+            plain.append(_PLAIN_MORE.substitute(company=company, more=more, url=board_url))
+    html.append(_HTML_CITY_CLOSE if city is not None else _HTML_EMPTY)
+    html.append(_HTML_FOOT.substitute(boards=len(registry.boards)))
+
+    return "".join(html), "".join(plain)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # EMAIL SENDER
 # ──────────────────────────────────────────────────────────────────────────────
 
-def send_email(html: str, plain: str, new_count: int):
-    sender    = os.environ["GMAIL_SENDER"]      # your Gmail address
-    password  = os.environ["GMAIL_APP_PASSWORD"] # Gmail App Password (16 chars)
-    recipient = os.environ["RECIPIENT_EMAIL"]   # where to deliver the digest
+SMTP_HOST     = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT     = int(os.environ.get("SMTP_PORT", "465"))
+SMTP_SECURITY = os.environ.get("SMTP_SECURITY", "ssl")     # ssl | starttls | none (e.g. a local test server)
+DELIVERY_ATTEMPTS = int(os.environ.get("DELIVERY_ATTEMPTS", "3"))  # refused sends before a digest is dropped
+
 
+def smtp_connect() -> smtplib.SMTP:
+    if SMTP_SECURITY == "ssl":
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=30)
+    else:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+        if SMTP_SECURITY == "starttls":
+            server.starttls()
+    password = os.environ.get("GMAIL_APP_PASSWORD")   # Gmail App Password (16 chars)
+    if password:
+        server.login(os.environ["GMAIL_SENDER"], password)
+    return server
+
+
+def compose(recipient: str, html: str, plain: str, new_count: int) -> MIMEMultipart:
+    sender = os.environ.get("GMAIL_SENDER", "job-alert@localhost")   # your Gmail address
     today = datetime.now().strftime("%b %d, %Y")
     subject = (f"🆕 Job Alert: {new_count} new posting(s) — {today}"
                if new_count else f"📭 Job Alert: No new postings — {today}")
@@ -425,12 +2268,229 @@ def send_email(html: str, plain: str, new_count: int):
 
     msg.attach(MIMEText(plain, "plain"))
     msg.attach(MIMEText(html,  "html"))
+    return msg
+
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(sender, password)
-        server.sendmail(sender, recipient, msg.as_string())
+def send_digests(new_jobs: list[dict], subscribers: list[Subscriber], send_empty: bool = True,
+                 checkpoint: "PendingDigest | None" = None) -> int:
+    """Send every subscriber their slice of `new_jobs` over one SMTP session.
 
-    log.info(f"Email sent to {recipient} — subject: {subject}")
+    Subscribers whose slices are identical share one rendered digest, and
+    with `send_empty=False` those with nothing new get no email. With a
+    `checkpoint`, each delivery is recorded as it happens and subscribers
+    already emailed from this batch only get postings they haven't seen.
+    A refused recipient is retried on later runs, up to DELIVERY_ATTEMPTS
+    times; a dropped connection is reopened once, and if it drops again
+    the rest wait for the next run. Returns the number of subscribers
+    still owed a digest.
+    """
+    routed = SubscriptionMatcher(subscribers).route(new_jobs)
+    rendered: dict[tuple, tuple[str, str]] = {}
+    sent, owed, server, down = 0, 0, None, False
+    try:
+        for sub, jobs in routed:
+            if checkpoint is not None and sub.email in checkpoint.delivered:
+                jobs = checkpoint.unsent(sub.email, jobs)
+                if not jobs:
+                    continue                       # already has this batch
+            if not jobs and not send_empty:
+                continue
+            if down:
+                owed += 1
+                continue
+            key = tuple(map(id, jobs))
+            if key not in rendered:
+                rendered[key] = build_email(jobs)
+            msg = compose(sub.email, *rendered[key], len(jobs))
+            for attempt in (1, 2):
+                try:
+                    server = server or smtp_connect()
+                    server.send_message(msg)
+                    sent += 1
+                    log.info(f"Email sent to {sub.email} — {len(jobs)} posting(s)")
+                    if checkpoint is not None:
+                        checkpoint.mark_delivered(sub.email, jobs)
+                    break
+                except smtplib.SMTPServerDisconnected as e:
+                    server = None
+                    if attempt == 2:
+                        log.error(f"SMTP connection lost twice, leaving the remaining digests for the next run: {e}")
+                        owed, down = owed + 1, True
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                    if checkpoint is None:
+                        log.error(f"Could not deliver to {sub.email}: {e}")
+                        owed += 1
+                    elif checkpoint.mark_failed(sub.email) < DELIVERY_ATTEMPTS:
+                        log.error(f"Could not deliver to {sub.email}, will retry: {e}")
+                        owed += 1
+                    else:
+                        log.error(f"Giving up on {len(jobs)} posting(s) for {sub.email} "
+                                  f"after {DELIVERY_ATTEMPTS} refused sends: {e}")
+                        checkpoint.mark_delivered(sub.email, jobs)
+                    break
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                pass
+    log.info(f"Sent {sent} of {len(routed)} digest(s) ({len(rendered)} distinct)"
+             + (f", {owed} still owed" if owed else ""))
+    return owed
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# WATCH MODE
+# `python job_agent.py --watch` keeps running: the seen store, HTTP session and
+# caches stay loaded, each board is crawled whenever its cadence comes round,
+# and new postings are batched into one digest every WATCH_FLUSH_MINUTES.
+# ──────────────────────────────────────────────────────────────────────────────
+
+PENDING_PATH        = Path("data/pending_jobs.json")
+WATCH_FLUSH_MINUTES = float(os.environ.get("WATCH_FLUSH_MINUTES", "30"))
+WATCH_POLL_SECONDS  = float(os.environ.get("WATCH_POLL_SECONDS", "300"))   # longest sleep between checks
+
+
+class PendingDigest:
+    """New postings found but not emailed yet, checkpointed to disk.
+
+    Written before the seen store commits and cleared only after every
+    subscriber has their digest, so a restart neither drops nor repeats an
+    alert. Postings are keyed by job id, so finding one twice (e.g. after a
+    crash before the commit) lists it once. Each successful send records
+    which ids that subscriber got, so a retry after a partial failure only
+    emails the people (and postings) still owed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._jobs: dict[str, dict] = {}
+        self.delivered: dict[str, set[str]] = {}   # email → job ids already sent to it
+        self.failures: dict[str, int] = {}         # email → refused sends in a row
+        if path.exists():
+            with open(path) as f:
+                state = json.load(f)
+            if isinstance(state, list):             # older checkpoints held just the postings
+                state = {"jobs": state}
+            self._jobs = {j["id"]: j for j in state["jobs"]}
+            self.delivered = {email: set(ids) for email, ids in state.get("delivered", {}).items()}
+            self.failures = dict(state.get("failures", {}))
+
+    @property
+    def jobs(self) -> list[dict]:
+        return list(self._jobs.values())
+
+    def extend(self, new_jobs: list[dict]):
+        for j in new_jobs:
+            self._jobs.setdefault(j["id"], j)
+        if new_jobs:
+            self.save()
+
+    def unsent(self, email: str, jobs: list[dict]) -> list[dict]:
+        done = self.delivered.get(email, ())
+        return [j for j in jobs if j["id"] not in done]
+
+    def mark_delivered(self, email: str, jobs: list[dict]):
+        self.delivered.setdefault(email, set()).update(j["id"] for j in jobs)
+        self.failures.pop(email, None)
+        self.save()
+
+    def mark_failed(self, email: str) -> int:
+        """Count a refused send to `email` and return how many there have been."""
+        self.failures[email] = self.failures.get(email, 0) + 1
+        self.save()
+        return self.failures[email]
+
+    def clear(self):
+        self._jobs.clear()
+        self.delivered.clear()
+        self.failures.clear()
+        self.path.unlink(missing_ok=True)
+
+    def save(self):
+        # Write-then-rename: a crash mid-write must not lose the batch.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        state = {
+            "jobs": self.jobs,
+            "delivered": {email: sorted(ids) for email, ids in self.delivered.items()},
+            "failures": self.failures,
+        }
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def seconds_until_due(boards: list[Board], now: datetime) -> float:
+    waits = [schedule.due_in(key, min(r.every_hours for r in rows), now) for key, rows in plan_fetches(boards).items()]
+    return min(waits, default=float("inf"))
+
+
+def flush(pending: PendingDigest, send_empty: bool = False):
+    """Email everything pending; the checkpoint is cleared once every subscriber has theirs."""
+    try:
+        owed = send_digests(pending.jobs, load_subscribers(), send_empty=send_empty, checkpoint=pending)
+    except Exception as e:
+        log.error(f"Could not send the digest, keeping {len(pending.jobs)} posting(s) for the next flush: {e}")
+        return
+    if owed:
+        log.warning(f"{owed} digest(s) not delivered, keeping {len(pending.jobs)} posting(s) for the next flush")
+    else:
+        pending.clear()
+
+
+def watch(flush_minutes: float = WATCH_FLUSH_MINUTES, poll_seconds: float = WATCH_POLL_SECONDS):
+    """Crawl boards as their cadence comes round and email a digest every
+    `flush_minutes`. CRAWL_BUDGET doesn't apply: it caps boards per run, and
+    here a board left out would stay due and start another pass at once.
+    Metrics of all the passes between two digests go into one file."""
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    seen = open_seen_store()
+    seen.defer_export = True                   # brought up to date at each flush and on exit
+    pending = PendingDigest(PENDING_PATH)
+    records: list[dict] = []
+    records_since = datetime.now()
+
+    def write_batch_metrics():
+        nonlocal records_since
+        if records:
+            log_slowest(records)
+            log.info(f"Metrics written to {write_metrics(records, records_since)}")
+            records.clear()
+        records_since = datetime.now()
+
+    next_flush = time.monotonic() + flush_minutes * 60
+    log.info(f"👀 Watching {len(registry.boards)} board(s); digest every {flush_minutes:g} min"
+             + (f", {len(pending.jobs)} posting(s) pending from the last run" if pending.jobs else ""))
+    if CRAWL_BUDGET:
+        log.info("CRAWL_BUDGET is ignored in watch mode; each board follows its own cadence")
+    try:
+        while not stop.is_set():
+            boards = registry.boards                   # picks up edits to the company list
+            if seconds_until_due(boards, datetime.now()) <= 0:
+                try:
+                    new_jobs, _ = collect_new_jobs(seen=seen, boards=boards, on_new=pending.extend,
+                                                   crawl_budget=0, on_metrics=records.extend)
+                    if new_jobs:
+                        log.info(f"✅ {len(new_jobs)} new job(s); {len(pending.jobs)} pending")
+                except Exception:
+                    log.exception("Crawl pass failed")
+            if time.monotonic() >= next_flush:
+                if pending.jobs:
+                    flush(pending)
+                seen.export_changes()
+                write_batch_metrics()
+                next_flush = time.monotonic() + flush_minutes * 60
+            wait = min(poll_seconds, next_flush - time.monotonic(), seconds_until_due(boards, datetime.now()))
+            stop.wait(max(1.0, wait))
+    finally:
+        seen.export_changes()
+        write_batch_metrics()
+        seen.close()
+        log.info(f"Stopped; {len(pending.jobs)} posting(s) left for the next run")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -438,10 +2498,27 @@ def send_email(html: str, plain: str, new_count: int):
 # ──────────────────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--watch", action="store_true", help="keep running and send batched digests")
+    ap.add_argument("--flush-minutes", type=float, default=WATCH_FLUSH_MINUTES,
+                    help="minutes between digests in --watch mode (default: %(default)g)")
+    args = ap.parse_args()
+
+    subscribers = load_subscribers()            # fail before crawling if the profiles are broken
+    if args.watch:
+        watch(args.flush_minutes)
+        raise SystemExit
+
     log.info("🔍 Starting daily job scan …")
-    new_jobs, seen = collect_new_jobs()
+    pending = PendingDigest(PENDING_PATH)
+    new_jobs, seen = collect_new_jobs(force=os.environ.get("CRAWL_ALL") == "1", on_new=pending.extend)
     log.info(f"✅ Found {len(new_jobs)} new job(s). Building email …")
 
-    html, plain = build_email(new_jobs)
-    send_email(html, plain, len(new_jobs))
+    seen.close()
+
+    owed = send_digests(pending.jobs, subscribers, checkpoint=pending)
+    if owed:
+        log.warning(f"{owed} digest(s) not delivered; kept in {PENDING_PATH} for the next run")
+    else:
+        pending.clear()
     log.info("🎉 Done!")
@@ -0,0 +1,92 @@
+import job_agent as ja
+
+WORKDAY = "https://acme.wd3.myworkdayjobs.com/en-US/Careers"
+
+
+class Reply:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def test_workday_page_limit_leaves_the_crawl_incomplete(monkeypatch):
+    def endless(url, method="GET", json=None, **kwargs):
+        offset = json["offset"]
+        postings = [{"title": f"Analyst {offset + i}", "externalPath": f"/job/Toronto/Analyst_R{offset + i}",
+                     "locationsText": "Toronto"} for i in range(ja.WORKDAY_PAGE_SIZE)]
+        return Reply({"total": 0, "jobPostings": postings})
+
+    monkeypatch.setattr(ja, "fetch", endless)
+    monkeypatch.setattr(ja, "WORKDAY_MAX_PAGES", 3)
+    jobs = ja.scrape_workday(WORKDAY)
+    assert len(jobs) == 3 * ja.WORKDAY_PAGE_SIZE
+    assert not jobs.complete
+
+
+def test_breaker_skips_a_failing_board_but_not_its_host(tmp_path, monkeypatch):
+    monkeypatch.setattr(ja, "breaker", ja.CircuitBreaker(tmp_path / "board_health.json", 2, 72))
+    dead = ja.Board("Gone", "Toronto", "https://boards.greenhouse.io/gone", "greenhouse")
+    alive = ja.Board("Here", "Toronto", "https://boards.greenhouse.io/here", "greenhouse")
+    calls = []
+
+    def scrape(url, seen=None, **options):
+        calls.append(url)
+        if url == dead.url:
+            ja.metric_error(Exception(f"404 from {url}"))
+            return []
+        return [{"title": "Analyst", "url": url + "/1", "location": "Toronto"}]
+
+    monkeypatch.setitem(ja.SCRAPERS, "greenhouse", scrape)
+    for _ in range(3):
+        for board in (dead, alive):
+            ja.scrape_board([board], None, ja.BoardMetrics(ja.board_key(board.url, board.ats), board.name, board.ats))
+    assert calls == [dead.url, alive.url, dead.url, alive.url, alive.url]
+
+
+def test_a_removed_board_is_an_error_not_an_empty_board(monkeypatch):
+    def not_found(method, url, **kwargs):
+        r = ja.requests.Response()
+        r.status_code, r.url, r._content = 404, url, b'{"status": 404, "error": "Job not found"}'
+        return r
+
+    monkeypatch.setattr(ja.session, "request", not_found)
+    monkeypatch.setattr(ja, "limiter", ja.HostRateLimiter(0))
+    board = ja.Board("Gone", "Toronto", "https://boards.greenhouse.io/gone", "greenhouse")
+    metrics = ja.BoardMetrics(ja.board_key(board.url, board.ats), board.name, board.ats)
+    monkeypatch.setattr(ja, "breaker", ja.CircuitBreaker(ja.Path("/nonexistent/board_health.json"), 3, 72))
+    assert ja.scrape_board([board], None, metrics) == []
+    assert metrics.record["status"] == "error" and metrics.record["requests"] == 1
+
+
+def test_parse_time_is_measured_when_pages_are_fetched_concurrently(monkeypatch):
+    links = "".join(f'<a href="/jobs?page={n}">{n}</a>' for n in range(2, 9))
+
+    class Page:
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+
+        def __init__(self, n):
+            rows = "".join(f'<a href="/job/{n}-{i}">Financial Analyst {n}-{i}</a>' for i in range(50))
+            self.content = f"<html><body>{rows}{links}</body></html>".encode()
+
+    def slow_fetch(url, **kwargs):
+        ja.time.sleep(0.2)
+        ja.metric(network_s=0.2)
+        return Page(int(url.rpartition("=")[2]) if "page=" in url else 1)
+
+    monkeypatch.setattr(ja, "fetch", slow_fetch)
+    monkeypatch.setattr(ja, "PARSE_PROCESSES", 0)
+    metrics = ja.BoardMetrics("html:portal", "Portal", "html")
+    token = ja._board_metrics.set(metrics)
+    try:
+        jobs = ja.scrape_html("https://careers.example.com/jobs")
+    finally:
+        ja._board_metrics.reset(token)
+    metrics.finish("ok", 0.6, len(jobs))
+    assert len(jobs) == 8 * 50 and jobs.complete
+    assert metrics.record["network_s"] > metrics.record["total_s"]
+    assert metrics.record["parse_s"] > 0
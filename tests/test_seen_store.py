@@ -0,0 +1,78 @@
+import job_agent as ja
+
+
+def store(tmp_path):
+    return ja.SqliteSeenStore(tmp_path / "seen.db", legacy_json=None, export=tmp_path / "seen.tsv")
+
+
+def test_export_appends_only_changed_jobs_and_rebuilds_the_db(tmp_path):
+    seen = store(tmp_path)
+    for i in range(4):
+        seen.add(f"job{i}", "2026-01-01", "b")
+    seen.commit()
+    before = (tmp_path / "seen.tsv").read_text()
+
+    seen.add("job9", "2026-01-02", "b")
+    seen.close_missing("b", {"job0", "job1", "job2", "job9"}, "2026-01-02")
+    seen.commit()
+    seen.close()
+    after = (tmp_path / "seen.tsv").read_text()
+    assert after.startswith(before)
+    assert after[len(before):] == "job3\t2026-01-01\tb\t2026-01-02\njob9\t2026-01-02\tb\t\n"
+
+    (tmp_path / "seen.db").unlink()
+    rebuilt = store(tmp_path)
+    rows = dict(rebuilt.conn.execute("SELECT job_id, closed_on FROM seen"))
+    assert rows == {"job0": None, "job1": None, "job2": None, "job3": "2026-01-02", "job9": None}
+
+
+def test_deferred_export_waits_for_export_changes(tmp_path):
+    seen = store(tmp_path)
+    seen.defer_export = True
+    seen.add("job0", "2026-01-01", "b")
+    seen.commit()
+    assert not (tmp_path / "seen.tsv").exists()
+    seen.export_changes()
+    assert "job0\t" in (tmp_path / "seen.tsv").read_text()
+
+
+class Today(ja.date):
+    day = ja.date(2026, 1, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.day
+
+
+def test_partial_crawls_and_compaction_do_not_re_alert_open_postings(tmp_path, monkeypatch):
+    monkeypatch.setattr(ja, "METRICS_DIR", tmp_path / "metrics")
+    monkeypatch.setattr(ja, "http_cache", ja.ValidatorCache(tmp_path / "http_cache.json"))
+    monkeypatch.setattr(ja, "breaker", ja.CircuitBreaker(tmp_path / "board_health.json", 3, 72))
+    monkeypatch.setattr(ja, "schedule", ja.CrawlSchedule(tmp_path / "crawl_state.json"))
+    monkeypatch.setattr(ja, "SEEN_RETENTION_DAYS", 5)
+    monkeypatch.setattr(ja, "date", Today)
+    postings = [{"title": f"Analyst {i}", "url": f"https://careers.example.com/job/{i}", "location": "Toronto"}
+                for i in range(40)]
+    read = {"count": 40}
+
+    def scrape(url, seen=None, **options):
+        jobs = ja.Postings(postings[:read["count"]])
+        jobs.complete = read["count"] == len(postings)
+        return jobs
+
+    monkeypatch.setitem(ja.SCRAPERS, "html", scrape)
+    boards = [ja.Board("Acme", "Toronto", "https://careers.example.com/jobs", "html")]
+    seen = store(tmp_path)
+
+    new, _ = ja.collect_new_jobs(seen=seen, boards=boards, force=True)
+    assert len(new) == 40
+    read["count"] = 20                                  # early stops at the first known page
+    for day in range(1, 10):
+        Today.day = ja.date(2026, 1, 1 + day)
+        new, _ = ja.collect_new_jobs(seen=seen, boards=boards, force=True)
+        assert new == []
+    read["count"] = 40
+    Today.day = ja.date(2026, 1, 11)
+    new, _ = ja.collect_new_jobs(seen=seen, boards=boards, force=True)
+    assert new == []
+    seen.close()
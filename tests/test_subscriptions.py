@@ -0,0 +1,67 @@
+import pytest
+
+import job_agent as ja
+
+
+def job(title, city="Toronto", company="Acme"):
+    return {"title": title, "city": city, "company": company, "url": "https://example.com/" + title}
+
+
+def routed(profiles, jobs):
+    subscribers = [ja.parse_subscriber(p) for p in profiles]
+    return {sub.email: [j["title"] for j in got] for sub, got in ja.SubscriptionMatcher(subscribers).route(jobs)}
+
+
+def test_keyword_nested_in_a_longer_keyword():
+    got = routed([{"email": "pm@x.com", "keywords": ["portfolio manager"]},
+                  {"email": "mgr@x.com", "keywords": ["manager"]}],
+                 [job("Portfolio Manager")])
+    assert got == {"pm@x.com": ["Portfolio Manager"], "mgr@x.com": ["Portfolio Manager"]}
+
+
+def test_seniority_word_inside_a_keyword_phrase():
+    got = routed([{"email": "kw@x.com", "keywords": ["portfolio manager", "senior analyst"]},
+                  {"email": "sr@x.com", "seniority": ["senior"]},
+                  {"email": "mid@x.com", "seniority": ["mid"]}],
+                 [job("Portfolio Manager"), job("Senior Analyst")])
+    assert got["sr@x.com"] == ["Portfolio Manager", "Senior Analyst"]
+    assert got["mid@x.com"] == []
+
+
+def test_exclude_nested_in_a_keyword_phrase():
+    got = routed([{"email": "kw@x.com", "keywords": ["senior analyst"]},
+                  {"email": "no-senior@x.com", "keywords": ["analyst"], "exclude": ["senior"]}],
+                 [job("Senior Analyst"), job("Analyst")])
+    assert got["kw@x.com"] == ["Senior Analyst"]
+    assert got["no-senior@x.com"] == ["Analyst"]
+
+
+def test_seniority_level_of_title():
+    matcher = ja.SubscriptionMatcher([])
+    assert matcher.seniority(matcher.hits("Portfolio Manager")) == "senior"
+    assert matcher.seniority(matcher.hits("Sr. Analyst")) == "senior"
+    assert matcher.seniority(matcher.hits("Fund Accountant Co-op (Summer)")) == "intern"
+    assert matcher.seniority(matcher.hits("Head of Fixed Income")) == "executive"
+    assert matcher.seniority(matcher.hits("Analyst")) == "mid"
+
+
+def test_terms_match_whole_words_only():
+    got = routed([{"email": "a@x.com", "keywords": ["lead"]}, {"email": "b@x.com", "keywords": ["c++"]}],
+                 [job("Leadership Programme"), job("C++ Developer"), job("Team Lead")])
+    assert got == {"a@x.com": ["Team Lead"], "b@x.com": ["C++ Developer"]}
+
+
+def test_city_and_company_filters():
+    got = routed([{"email": "a@x.com", "cities": ["halifax"], "companies": ["Citco"]}],
+                 [job("Analyst", "Halifax", "Citco"), job("Analyst", "Toronto", "Citco"),
+                  job("Analyst", "Halifax", "MUFG")])
+    assert got == {"a@x.com": ["Analyst"]}
+
+
+def test_invalid_profiles_are_rejected():
+    with pytest.raises(ValueError):
+        ja.parse_subscriber({"email": "a@x.com", "seniority": ["guru"]})
+    with pytest.raises(ValueError):
+        ja.parse_subscriber({"email": "a@x.com", "keywords": ["!!!"]})
+    with pytest.raises(ValueError):
+        ja.parse_subscriber({"email": "not-an-address"})